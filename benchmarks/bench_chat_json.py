@@ -0,0 +1,103 @@
+"""Benchmark: original regex chat JSON extractor vs. the bracket-aware scanner.
+
+Builds large bot replies with many JSON tables separated by prose and reports
+throughput, tables recovered and time per recovered table. The original
+extractor only returns the first block, so it is applied repeatedly to the
+rest of the reply, the way it would have to be used for several tables. Reply
+kinds:
+
+    objects   flat JSON objects, the one shape the regex can parse
+    flat      arrays of objects, each preceded by a "[notes]" aside
+    nested    objects holding arrays of objects, with the same asides
+    invalid   deeply nested brackets that are not JSON, plus one real table
+
+Run from the repository root:
+
+    python -m benchmarks.bench_chat_json --tables 200 --rows 20
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks import legacy_parsers
+from health_analyzer.chat import extract_json_segments
+
+KINDS = ("objects", "flat", "nested", "invalid")
+
+def _slot(rng):
+    return {"doctor": f"Dr. {rng.choice(['Rao', 'Lee', 'Khan', 'Diaz'])}",
+            "time": f"{rng.randint(8, 17)}:{rng.choice(['00', '30'])}",
+            "room": rng.randint(1, 40)}
+
+def synthetic_reply(tables, rows, kind, seed=0):
+    # Returns (reply, number of tables in it)
+    rng = random.Random(seed)
+    parts = []
+    if kind == "objects":
+        for t in range(tables):
+            parts.append(f"Option {t} is available:")
+            parts.append(json.dumps(dict(_slot(rng), department=f"Clinic {t}")))
+        return "\n".join(parts), tables
+    if kind == "invalid":
+        depth = 50
+        for t in range(tables * rows):
+            parts.append("[" * depth + f"draft {t}, not JSON" + "]" * depth)
+        parts.append("Final answer:")
+        parts.append(json.dumps([_slot(rng) for _ in range(rows)]))
+        return "\n".join(parts), 1
+    for t in range(tables):
+        slots = [_slot(rng) for _ in range(rows)]
+        block = {"department": f"Clinic {t}", "slots": slots} if kind == "nested" else slots
+        parts.append(f"Here are the options for request {t} (see [notes] below):")
+        parts.append(json.dumps(block))
+    return "\n".join(parts), tables * (2 if kind == "nested" else 1)
+
+def legacy_all(text):
+    # The original extractor applied to what follows each block it finds;
+    # stops at the first block it can't parse, as the app did
+    found = 0
+    rest = text
+    while rest:
+        _, data, after = legacy_parsers.extract_json_from_text(rest)
+        if data is None:
+            break
+        found += 1
+        rest = after
+    return found
+
+def scanner_all(text):
+    return sum(1 for kind, _, _ in extract_json_segments(text) if kind == "table")
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings), found
+
+def per_table(elapsed, found):
+    return f"{elapsed / found * 1e6:.1f}" if found else "-"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'reply':<10}{'size KiB':>10}{'tables':>8}"
+          f"{'regex MB/s':>12}{'found':>7}{'us/table':>10}"
+          f"{'scanner MB/s':>14}{'found':>7}{'us/table':>10}")
+    for kind in KINDS:
+        text, expected = synthetic_reply(args.tables, args.rows, kind)
+        size = len(text.encode("utf-8"))
+        before, legacy_found = best_of(legacy_all, text, args.repeat)
+        after, scanner_found = best_of(scanner_all, text, args.repeat)
+        print(f"{kind:<10}{size / 1024:>10.1f}{expected:>8}"
+              f"{size / before / 1e6:>12.1f}{legacy_found:>7}{per_table(before, legacy_found):>10}"
+              f"{size / after / 1e6:>14.1f}{scanner_found:>7}{per_table(after, scanner_found):>10}")
+
+if __name__ == "__main__":
+    main()
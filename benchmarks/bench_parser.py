@@ -0,0 +1,74 @@
+"""Micro-benchmark: original per-panel parsers vs. the table-driven engine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parser --lines 10000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from benchmarks import legacy_parsers
+from health_analyzer.parser import PANELS
+from health_analyzer.report import (
+    parse_all_panels,
+    parse_diabetes_report,
+    parse_heart_attack_report,
+    parse_liver_function_test,
+)
+
+CASES = [
+    ("Liver disease prediction", legacy_parsers.parse_liver_function_test, parse_liver_function_test),
+    ("Diabetes prediction", legacy_parsers.parse_diabetes_report, parse_diabetes_report),
+    ("Heart attack prediction", legacy_parsers.parse_heart_attack_report, parse_heart_attack_report),
+]
+
+NOISE = ["Test Name", "Result", "Units", "Reference Range", "Method: Photometry", "Page 1 of 3", "Remarks"]
+
+def synthetic_lines(count, seed=0):
+    rng = random.Random(seed)
+    # Values are written in the API's unit so no conversion applies and the
+    # engine's output stays comparable with the original parsers
+    labels = sorted({(alias.title(), field.unit or "") for panel in PANELS
+                     for field in panel.fields for alias in field.aliases})
+    lines = ["Name", "Jane Doe", "Age", "52", "Gender", "Female", "Sex", "Female"]
+    while len(lines) < count:
+        if rng.random() < 0.5:
+            label, unit = rng.choice(labels)
+            lines.append(label)
+            lines.append(f"{rng.uniform(0.1, 300):.2f} {unit}".rstrip())
+        else:
+            lines.append(rng.choice(NOISE))
+    return lines[:count]
+
+def best_of(func, lines, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    lines = synthetic_lines(args.lines)
+    print(f"{'parser':<28}{'before lines/s':>16}{'after lines/s':>16}{'speedup':>10}")
+    legacy_total = 0.0
+    for disease, legacy, engine in CASES:
+        if legacy(lines) != engine(lines):
+            raise SystemExit(f"{disease}: engine output differs from the original parser")
+        before = best_of(legacy, lines, args.repeat)
+        after = best_of(engine, lines, args.repeat)
+        legacy_total += before
+        print(f"{disease:<28}{len(lines) / before:>16,.0f}{len(lines) / after:>16,.0f}{before / after:>9.1f}x")
+
+    combined = best_of(parse_all_panels, lines, args.repeat)
+    print(f"{'All panels (one pass)':<28}{len(lines) / legacy_total:>16,.0f}"
+          f"{len(lines) / combined:>16,.0f}{legacy_total / combined:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark every stage of the report-processing pipeline.
+
+Synthetic LFT, diabetes and cardiac PDFs of several sizes are generated with
+PyMuPDF, then each stage is timed: extract_text_from_pdf,
+refine_medical_report, the parse_* and convert_*_to_api_json functions, whole
+report parsing in text and layout mode, and a prediction round trip to a local
+stub of the API. Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --compare results.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.stub_server import StubServer
+from benchmarks.synthetic import make_pdf
+from health_analyzer.client import HttpClient
+from health_analyzer.report import PARSERS, extract_text_from_pdf, parse_report, refine_medical_report
+
+DISEASES = {
+    "lft": "Liver disease prediction",
+    "diabetes": "Diabetes prediction",
+    "cardiac": "Heart attack prediction"
+}
+
+def percentile(sorted_samples, p):
+    index = min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+def measure(func, arg, repeat, items=1):
+    # Wall-clock timings first, then one extra call under tracemalloc for peak
+    # memory so the allocation tracing does not skew the latencies.
+    func(arg)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples.sort()
+    total = sum(samples)
+    return {
+        "calls": repeat,
+        "throughput_per_s": items * repeat / total if total else 0.0,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "peak_kib": peak / 1024
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, repeat, stub_latency):
+    results = {}
+    with StubServer(latency=stub_latency) as stub:
+        client = HttpClient(max_retries=0)
+        for short_name, disease in DISEASES.items():
+            parse, convert = PARSERS[disease]
+            for pages in sizes:
+                prefix = f"{short_name}/{pages}p"
+                pdf = make_pdf(disease, pages)
+                text = extract_text_from_pdf(pdf)
+                raw_lines = [line.strip() for line in text.split("\n") if line.strip()]
+                lines = refine_medical_report(raw_lines)
+                parsed = parse(lines)
+                payload = convert(parsed)
+
+                results[f"{prefix}/extract_text_from_pdf"] = measure(extract_text_from_pdf, pdf, repeat)
+                results[f"{prefix}/refine_medical_report"] = measure(refine_medical_report, raw_lines, repeat)
+                results[f"{prefix}/{parse.__name__}"] = measure(parse, lines, repeat)
+                results[f"{prefix}/{convert.__name__}"] = measure(convert, parsed, repeat)
+                # Whole-report parsing with line pairing vs. layout (word position) pairing
+                for layout, mode in ((False, "text"), (True, "layout")):
+                    results[f"{prefix}/parse_report_{mode}"] = measure(
+                        lambda data: parse_report(data, disease, stop_early=False, layout=layout), pdf, repeat
+                    )
+            results[f"{short_name}/predict_stub"] = measure(
+                lambda body: client.post_json(stub.url, body), payload, repeat
+            )
+        client.close()
+    return results
+
+def compare(results, baseline, threshold):
+    # Flags any benchmark whose p50 got slower than the baseline by more than threshold
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous["p50_ms"]:
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{name:<58}{previous['p50_ms']:>10.3f}{current['p50_ms']:>10.3f}{change:>+9.1%} {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50], help="Report sizes in pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Artificial delay of the stub API")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.stub_latency_ms / 1000)
+    print(f"{'benchmark':<58}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>10}")
+    for name, r in results.items():
+        print(f"{name:<58}{r['throughput_per_s']:>12,.1f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+              f"{r['p99_ms']:>10.3f}{r['peak_kib']:>10.1f}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "sizes": args.sizes,
+                "repeat": args.repeat,
+                "stub_latency_ms": args.stub_latency_ms
+            },
+            "results": results
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print()
+        print(f"{'benchmark':<58}{'base p50':>10}{'now p50':>10}{'change':>9}")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
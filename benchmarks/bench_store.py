@@ -0,0 +1,82 @@
+"""Benchmark: result store inserts and trend queries at millions of rows.
+
+Fills a temporary store with synthetic panels for many patients, then times a
+per-patient trend, the field list of a patient and a per-field date range
+across patients. Run from the repository root:
+
+    python -m benchmarks.bench_store --patients 20000 --reports 10
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from health_analyzer.parser import PANELS_BY_DISEASE, payload_columns
+from health_analyzer.store import NON_RESULT_KEYS, ResultStore
+
+DISEASES = list(PANELS_BY_DISEASE)
+
+def synthetic_records(patients, reports, seed=0):
+    rng = random.Random(seed)
+    first_day = datetime.date(2020, 1, 1)
+    for patient in range(patients):
+        for report in range(reports):
+            disease = DISEASES[(patient + report) % len(DISEASES)]
+            payload = {name: round(rng.uniform(1, 200), 1) for name in payload_columns(disease)}
+            yield {"patient": f"Patient {patient}", "disease": disease, "payload": payload,
+                   "taken_on": first_day + datetime.timedelta(days=30 * report + rng.randint(0, 20)),
+                   "prediction": {"prediction": rng.choice(["Yes", "No"]), "message": ""}}
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--reports", type=int, default=10, help="Reports per patient")
+    parser.add_argument("--batch", type=int, default=1000, help="Reports per transaction")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+        start = time.perf_counter()
+        batch = []
+        values = 0
+        for record in synthetic_records(args.patients, args.reports):
+            batch.append(record)
+            values += sum(1 for name in record["payload"] if name not in NON_RESULT_KEYS)
+            if len(batch) == args.batch:
+                store.save_reports(batch)
+                batch = []
+        if batch:
+            store.save_reports(batch)
+        elapsed = time.perf_counter() - start
+        print(f"inserted {args.patients * args.reports} reports / {values} values in {elapsed:.1f}s "
+              f"({values / elapsed:,.0f} values/s)")
+
+        rng = random.Random(1)
+        patient = f"Patient {rng.randrange(args.patients)}"
+        fields = store.fields(patient)
+        queries = {
+            "fields(patient)": lambda: store.fields(patient),
+            "trend(patient, 3 fields)": lambda: store.trend(patient, fields[:3]),
+            "trend(patient, 1 field, 1 year)": lambda: store.trend(patient, fields[:1], "2020-01-01", "2020-12-31"),
+            "field_values(field, 1 week)": lambda: store.field_values(fields[0], "2020-03-01", "2020-03-07"),
+            "reports(patient)": lambda: store.reports(patient)
+        }
+        print(f"{'query':<34}{'ms':>10}{'rows':>8}")
+        for name, query in queries.items():
+            elapsed, rows = best_of(query, args.repeat)
+            print(f"{name:<34}{elapsed * 1000:>10.3f}{len(rows):>8}")
+        store.close()
+
+if __name__ == "__main__":
+    main()
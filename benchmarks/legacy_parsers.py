@@ -0,0 +1,185 @@
+# Verbatim copies of the original line-by-line parsers and chat JSON
+# extractor, kept only as the "before" baseline for the benchmarks.
+import ast
+import json
+import re
+
+def parse_liver_function_test(lines):
+    results = {
+        "patient_information": {},
+        "lft_results": {}
+    }
+    lft_keys = {
+        "total bilirubin": "total_bilirubin",
+        "direct bilirubin": "direct_bilirubin",
+        "alkaline phosphatase": "alkaline_phosphatase",
+        "sgpt": "sgpt",
+        "sgot": "sgot",
+        "total proteins": "total_proteins",
+        "albumin": "albumin",
+        "albumin / globulin ratio": "albumin_globulin_ratio"
+    }
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        lower = line.lower()
+        if lower.startswith("name"):
+            if i+1 < len(lines):
+                results["patient_information"]["name"] = lines[i+1].strip()
+                i += 1
+        elif lower.startswith("age"):
+            if i+1 < len(lines):
+                try:
+                    results["patient_information"]["age"] = int(lines[i+1].strip())
+                except ValueError:
+                    pass
+                i += 1
+        elif lower.startswith("gender"):
+            if i+1 < len(lines):
+                results["patient_information"]["gender"] = lines[i+1].strip().capitalize()
+                i += 1
+        else:
+            for key in lft_keys:
+                if lower == key:
+                    if i+1 < len(lines):
+                        value = lines[i+1].strip()
+                        try:
+                            num = float(re.findall(r"[\d.]+", value)[0])
+                        except Exception:
+                            num = None
+                        if num is not None:
+                            results["lft_results"][lft_keys[key]] = num
+                        i += 1
+        i += 1
+    return results
+
+def parse_diabetes_report(lines):
+    results = {
+        "patient_information": {},
+        "diabetes_results": {}
+    }
+    diabetes_keys = {
+        "age": "Age",
+        "sex": "Sex",
+        "bmi": "BMI",
+        "bp": "BP",
+        "tc": "TC",
+        "ldl": "LDL",
+        "hdl": "HDL",
+        "tch": "TCH",
+        "ltg": "LTG",
+        "glu": "GLU",
+        "diabetes value": "Diabetes_Value"
+    }
+    
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        lower = line.lower()
+        if lower.startswith("name"):
+            if i+1 < len(lines):
+                results["patient_information"]["Name"] = lines[i+1].strip()
+                i += 1
+        elif lower.startswith("age"):
+            if i+1 < len(lines):
+                try:
+                    results["patient_information"]["Age"] = int(lines[i+1].strip())
+                except ValueError:
+                    pass
+                i += 1
+        elif lower.startswith("sex"):
+            if i+1 < len(lines):
+                results["patient_information"]["Sex"] = lines[i+1].strip().capitalize()
+                i += 1
+        else:
+            for key in diabetes_keys:
+                if lower == key:
+                    if i+1 < len(lines):
+                        value = lines[i+1].strip()
+                        try:
+                            num = float(re.findall(r"[\d.]+", value)[0])
+                        except Exception:
+                            num = None
+                        if num is not None:
+                            results["diabetes_results"][diabetes_keys[key]] = num
+                        i += 1
+        i += 1
+    return results
+
+def parse_heart_attack_report(lines):
+    results = {
+        "patient_information": {},
+        "heart_results": {}
+    }
+    heart_keys = {
+        "ldl": "LDL",
+        "hdl": "HDL",
+        "triglycerides": "Triglycerides",
+        "fasting blood sugar": "Fasting_Blood_Sugar",
+        "complete blood count": "Complete_Blood_Count",
+        "total cholesterol": "Total_Cholesterol",
+        "non hdl cholesterol": "Non_HDL_Cholesterol",
+        "c reactive protein": "C_Reactive_Protein",
+        "lipoprotein": "Lipoprotein",
+        "plasma ceramides": "Plasma_Ceramides",
+        "natriuretic peptides": "Natriuretic_Peptides",
+        "troponin t": "Troponin_T"
+    }
+     
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        lower = line.lower()
+        if lower.startswith("name"):
+            if i+1 < len(lines):
+                results["patient_information"]["Name"] = lines[i+1].strip()
+                i += 1
+        elif lower.startswith("age"):
+            if i+1 < len(lines):
+                try:
+                    results["patient_information"]["Age"] = int(lines[i+1].strip())
+                except ValueError:
+                    pass
+                i += 1
+        elif lower.startswith("sex"):
+            if i+1 < len(lines):
+                results["patient_information"]["Sex"] = lines[i+1].strip().capitalize()
+                i += 1
+        else:
+            for key in heart_keys:
+                if lower == key:
+                    if i+1 < len(lines):
+                        value = lines[i+1].strip()
+                        try:
+                            num = float(re.findall(r"[\d.]+", value)[0])
+                        except Exception:
+                            num = None
+                        if num is not None:
+                            results["heart_results"][heart_keys[key]] = num
+                        i += 1
+        i += 1
+    return results
+
+def extract_json_from_text(text):
+# Find JSON array or object in the text
+    match = re.search(r'(\[.*?\]|\{.*?\})', text, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+        try:
+            data = json.loads(json_str)
+            # If the value is a stringified Python dict, parse it
+            if isinstance(data, dict) and "agent_output" in data:
+                try:
+                    inner_data = ast.literal_eval(data["agent_output"])
+                    if isinstance(inner_data, dict):
+                        data = [inner_data]
+                except Exception:
+                    pass
+            elif isinstance(data, dict):
+                data = [data]
+            before = text[:match.start()].strip()
+            after = text[match.end():].strip()
+            return before, data, after
+        except Exception:
+            pass
+    return text, None, None
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAT_REPLY = 'Here are the available slots: [{"doctor": "Dr. Rao", "time": "10:00"}, {"doctor": "Dr. Lee", "time": "11:30"}]'
+
+class StubPredictionHandler(BaseHTTPRequestHandler):
+    # Answers every POST with a fixed prediction after the configured delay,
+    # or with the next of the queued error statuses while there are any; the
+    # chatbot path instead streams a reply word by word with chunked encoding.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+        if self.path.endswith("/appointment-booking-and-checking"):
+            return self.stream_chat_reply()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if status != 200:
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({
+            "prediction": "stub",
+            "message": f"Stub prediction for {payload.get('Prediction_Type', 'unknown')}"
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_chat_reply(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for word in CHAT_REPLY.split(" "):
+                data = (word + " ").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+                if self.server.chunk_delay:
+                    time.sleep(self.server.chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer:
+    def __init__(self, latency=0.0, chunk_delay=0.0, statuses=()):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubPredictionHandler)
+        self.server.latency = latency
+        self.server.chunk_delay = chunk_delay
+        self.server.statuses = list(statuses)
+        self.server.requests = 0
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,51 @@
+import random
+
+import fitz
+
+from health_analyzer.parser import PANELS_BY_DISEASE
+from health_analyzer.units import REFERENCE_RANGES
+
+LINES_PER_PAGE = 48
+
+FILLER = [
+    "Method: Spectrophotometry",
+    "Sample type: Serum",
+    "Reference interval provided by laboratory",
+    "Results relate only to the sample tested",
+    "Reviewed by: Dr. A. Smith",
+]
+
+def field_value(field, rng):
+    # A value inside the field's plausibility limits (in its own unit), so the
+    # synthetic payloads pass validation and reach prediction
+    limits = REFERENCE_RANGES[field.api_key]
+    low = max(limits.low, 0.01)
+    high = limits.high if limits.high is not None else max(low * 10, 200)
+    return round(rng.uniform(low, high), 2)
+
+def report_lines(disease, pages=1, seed=0):
+    # Patient header, one block of the panel's fields, then filler until the
+    # requested number of pages is reached (fields repeat every page so larger
+    # reports also exercise the parser, not just text extraction).
+    rng = random.Random(seed)
+    panel = PANELS_BY_DISEASE[disease]
+    sex_label = "Gender" if "gender" in panel.patient_keys else "Sex"
+    header = ["Name: Synthetic Patient", f"Age: {rng.randint(20, 80)}", f"{sex_label}: {rng.choice(['Male', 'Female'])}"]
+    lines = list(header)
+    while len(lines) < pages * LINES_PER_PAGE:
+        for field in panel.fields:
+            unit = f" {field.unit}" if field.unit else ""
+            lines.append(field.aliases[0].title())
+            lines.append(f"{field_value(field, rng):.2f}{unit}")
+        lines.extend(rng.choice(FILLER) for _ in range(10))
+    return lines[:pages * LINES_PER_PAGE]
+
+def make_pdf(disease, pages=1, seed=0):
+    lines = report_lines(disease, pages, seed)
+    document = fitz.open()
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((50, 50), "\n".join(lines[start:start + LINES_PER_PAGE]), fontsize=10)
+    data = document.tobytes()
+    document.close()
+    return data
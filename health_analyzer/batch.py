@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from health_analyzer.config import MODEL_DIR, PREDICTION_BACKEND
+from health_analyzer.ocr import run_inline
+from health_analyzer.report import PARSERS, process_report
+from health_analyzer.units import validate_payload
+
+def _process_one(name, source, disease):
+    # Runs inside a worker process, so errors are returned rather than raised
+    # to keep one bad PDF from aborting the whole batch.
+    try:
+        payload, patient = process_report(source, disease)
+        return {"name": name, "patient": patient, "payload": payload, "error": None}
+    except Exception as e:
+        return {"name": name, "patient": "", "payload": None, "error": str(e)}
+
+def process_reports(sources, disease, max_workers=None):
+    # sources is an iterable of (name, path_or_bytes); results are yielded as they finish
+    # Workers OCR scanned pages themselves rather than each starting an OCR pool
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=run_inline) as pool:
+        futures = [pool.submit(_process_one, name, source, disease) for name, source in sources]
+        for future in as_completed(futures):
+            yield future.result()
+
+def throughput(count, elapsed):
+    return count / elapsed if elapsed > 0 else 0.0
+
+def find_pdfs(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.join(root, filename)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a directory of blood test reports in parallel.")
+    parser.add_argument("directory", help="Directory to scan (recursively) for PDF reports")
+    parser.add_argument("--disease", choices=sorted(PARSERS), required=True)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--predict", action="store_true", help="Also run a prediction for each payload")
+    parser.add_argument("--backend", choices=["remote", "local"], default=PREDICTION_BACKEND)
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Model directory for the local backend")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.predict:
+        from health_analyzer.predict import make_predictor
+        predictor = make_predictor(args.backend, model_dir=args.model_dir)
+
+    sources = [(path, path) for path in find_pdfs(args.directory)]
+    out = open(args.output, "w") if args.output else sys.stdout
+    count = failed = 0
+    start = time.perf_counter()
+    try:
+        for result in process_reports(sources, args.disease, args.workers):
+            count += 1
+            if result["error"]:
+                failed += 1
+            elif args.predict:
+                errors, result["flags"] = validate_payload(args.disease, result["payload"])
+                if errors:
+                    result["error"] = "Not sent for prediction: " + "; ".join(errors)
+                    failed += 1
+                else:
+                    try:
+                        result["prediction"] = predictor.predict(args.disease, result["payload"])
+                    except Exception as e:
+                        result["error"] = f"Prediction failed: {e}"
+                        failed += 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Processed {count} reports ({failed} failed) in {elapsed:.2f}s "
+          f"- {throughput(count, elapsed):.2f} reports/sec", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
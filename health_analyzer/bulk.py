@@ -0,0 +1,156 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from health_analyzer.config import MODEL_DIR, PREDICTION_BACKEND
+from health_analyzer.parser import SEX_COLUMNS, payload_columns
+from health_analyzer.predict import LocalPredictor, RemotePredictor, make_client
+from health_analyzer.units import check_values, describe_row, normalize_values, payload_units
+
+SEX_VALUES = {"male": 1.0, "m": 1.0, "1": 1.0, "1.0": 1.0, "female": 0.0, "f": 0.0, "0": 0.0, "0.0": 0.0}
+
+RESULT_COLUMNS = ["prediction", "message", "error", "flags"]
+
+def read_chunks(source, chunksize=5000, file_format=None):
+    # source is a path or a binary file object; file_format is "csv" or "parquet"
+    # and is inferred from the file name when omitted
+    if file_format is None:
+        name = source if isinstance(source, str) else getattr(source, "name", "")
+        file_format = "parquet" if name.lower().endswith((".parquet", ".pq")) else "csv"
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+def coerce_chunk(chunk, disease, units=None):
+    # Returns (payload_frame, error_series, flag_series): every payload column as
+    # float64 in the API's units, a per-row error message ("" for valid rows) and
+    # the values outside their reference interval, all computed column-wise.
+    # Values are converted from units[column] or from a "<column>_unit" column
+    # when the file has one; otherwise they are taken to be in the API's unit.
+    columns = payload_columns(disease)
+    missing = [column for column in columns if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns for {disease}: {', '.join(missing)}")
+
+    units = units or {}
+    sex_column = SEX_COLUMNS[disease]
+    frame = pd.DataFrame(index=chunk.index)
+    for column in columns:
+        if column == sex_column:
+            frame[column] = chunk[column].astype(str).str.strip().str.lower().map(SEX_VALUES)
+            continue
+        values = pd.to_numeric(chunk[column], errors="coerce")
+        unit_column = f"{column}_unit"
+        if unit_column in chunk.columns:
+            values = normalize_values(column, values, chunk[unit_column].tolist())
+        elif column in units:
+            values = normalize_values(column, values, units[column])
+        frame[column] = values
+    frame = frame.astype("float64")
+
+    values = frame.to_numpy()
+    masks = check_values(columns, values)
+    errors = pd.Series("", index=chunk.index, dtype=object)
+    flags = pd.Series("", index=chunk.index, dtype=object)
+    rows = np.flatnonzero(np.logical_or.reduce([mask.any(axis=1) for mask in masks.values()]))
+    if len(rows):
+        api_units = payload_units(disease)
+        described = [describe_row(columns, api_units, values, masks, row) for row in rows.tolist()]
+        errors.iloc[rows] = ["; ".join(row_errors) for row_errors, _ in described]
+        flags.iloc[rows] = ["; ".join(row_flags) for _, row_flags in described]
+    return frame, errors, flags
+
+def predict_chunk(predictor, chunk, disease, units=None):
+    frame, errors, flags = coerce_chunk(chunk, disease, units)
+    results = pd.DataFrame({"prediction": "", "message": "", "error": errors, "flags": flags}, index=chunk.index)
+    valid = frame[errors == ""]
+    payloads = [dict(record, Prediction_Type=disease) for record in valid.to_dict("records")]
+
+    # The remote API scores one payload per request, so there a chunk becomes a
+    # batch of concurrent requests bounded by the predictor's max_workers; the
+    # local backend scores the whole chunk in one vectorized call.
+    outcomes = [
+        ("", "", str(result)) if isinstance(result, Exception)
+        else (result.get("prediction", ""), result.get("message", ""), "")
+        for result in predictor.predict_batch(disease, payloads)
+    ]
+    if outcomes:
+        results.loc[valid.index, ["prediction", "message", "error"]] = outcomes
+    return pd.concat([chunk, results], axis=1)
+
+def predict_file(predictor, source, disease, chunksize=5000, file_format=None, units=None):
+    for chunk in read_chunks(source, chunksize, file_format):
+        yield predict_chunk(predictor, chunk, disease, units)
+
+class ResultWriter:
+    # Appends result chunks to CSV or Parquet so only one chunk is held at a time
+    def __init__(self, target, file_format="csv"):
+        self.target = target
+        self.file_format = file_format
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, chunk):
+        if self.file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk.astype(dict.fromkeys(RESULT_COLUMNS, str)),
+                                         preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.target, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.target, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of blood parameters.")
+    parser.add_argument("input", help="CSV or Parquet file whose columns match the API payload keys")
+    parser.add_argument("output", help="CSV or Parquet file to write (format taken from the extension)")
+    parser.add_argument("--disease", choices=sorted(SEX_COLUMNS), required=True)
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent API requests")
+    parser.add_argument("--backend", choices=["remote", "local"], default=PREDICTION_BACKEND)
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Model directory for the local backend")
+    parser.add_argument("--unit", action="append", default=[], metavar="COLUMN=UNIT",
+                        help="Unit of a column that isn't in the API's unit, e.g. LDL=mmol/L (repeatable)")
+    args = parser.parse_args(argv)
+
+    units = dict(item.split("=", 1) for item in args.unit)
+    if args.backend == "local":
+        predictor = LocalPredictor(args.model_dir)
+    else:
+        client = make_client(pool_maxsize=max(args.concurrency, 10))
+        predictor = RemotePredictor(client, max_workers=args.concurrency)
+
+    output_format = "parquet" if args.output.lower().endswith((".parquet", ".pq")) else "csv"
+    writer = ResultWriter(args.output, output_format)
+    failed = 0
+    start = time.perf_counter()
+    try:
+        for chunk in predict_file(predictor, args.input, args.disease, args.chunksize, units=units):
+            writer.write(chunk)
+            failed += int((chunk["error"] != "").sum())
+            print(f"{writer.rows} rows scored", file=sys.stderr)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Scored {writer.rows} rows ({failed} failed) in {elapsed:.2f}s "
+          f"- {writer.rows / elapsed if elapsed > 0 else 0.0:.1f} rows/sec", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
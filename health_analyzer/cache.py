@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from health_analyzer.config import PARSE_SETTINGS
+
+MISSING = object()
+
+def pdf_cache_key(data, disease, namespace="parse"):
+    # namespace keeps entries holding different shapes apart when caches
+    # share a database (the app caches parsed JSON, the service payloads)
+    return f"{namespace}:{disease}:{PARSE_SETTINGS}:{hashlib.sha256(data).hexdigest()}"
+
+def payload_cache_key(url, payload):
+    # Canonicalize so key order and whitespace don't produce distinct entries
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f"predict:{url}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+class LRUCache:
+    def __init__(self, maxsize=256, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+class SQLiteCache:
+    # Same interface as LRUCache but persisted, so entries survive app restarts.
+    # Values must be JSON-serializable.
+    def __init__(self, path, maxsize=10000, ttl=86400, table="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._table = table
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+
+    def get(self, key, default=MISSING):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created FROM {self._table} WHERE key = ?", (key,)).fetchone()
+            if row is not None and (self.ttl is None or now - row[1] < self.ttl):
+                with self._conn:
+                    self._conn.execute(f"UPDATE {self._table} SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+            if row is not None:
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            if self.ttl is not None:
+                self._conn.execute(f"DELETE FROM {self._table} WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN ("
+                f"SELECT key FROM {self._table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+class Coalescer:
+    # Calls made with the key of a call that is still running wait for that
+    # call's result (or exception) instead of repeating it, e.g. the same
+    # payload submitted twice or from two sessions at once.
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, func, *args):
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._futures)}
+
+def make_cache(maxsize, ttl, path=None, table="cache"):
+    if path:
+        return SQLiteCache(path, maxsize=maxsize, ttl=ttl, table=table)
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,148 @@
+import ast
+import json
+import re
+from bisect import bisect_right, insort
+
+_decoder = json.JSONDecoder()
+
+_CLOSERS = {"]": "[", "}": "{"}
+
+_STRUCTURAL_RE = re.compile(r'[\[\]{}"\\]')
+
+# Spans nested deeper than this are not decoded (the json module recurses per
+# level); their shallower inner spans still are
+MAX_NESTING = 100
+
+def _bracket_spans(text):
+    # One pass over the structural characters recording the (start, end) of
+    # every balanced [...] / {...} pair no deeper than MAX_NESTING. Double-quoted
+    # strings are only tracked inside brackets, so stray quotes in the
+    # surrounding prose don't matter. Stack entries are [opener, start, depth],
+    # depth being the deepest nesting found inside so far.
+    spans = []
+    stack = []
+    in_string = False
+    escaped_at = -1
+    for match in _STRUCTURAL_RE.finditer(text):
+        i = match.start()
+        char = text[i]
+        if in_string:
+            if i == escaped_at:
+                continue
+            if char == "\\":
+                escaped_at = i + 1
+            elif char == '"':
+                in_string = False
+        elif char == "[" or char == "{":
+            stack.append([char, i, 1])
+        elif char in _CLOSERS:
+            if stack and stack[-1][0] == _CLOSERS[char]:
+                _, start, depth = stack.pop()
+                if depth <= MAX_NESTING:
+                    spans.append((start, i + 1))
+                if stack and stack[-1][2] <= depth:
+                    stack[-1][2] = depth + 1
+            else:
+                # Mismatched bracket: whatever was open can't be valid JSON
+                stack.clear()
+        elif char == '"' and stack:
+            in_string = True
+    spans.sort()
+    return spans
+
+def iter_json_blocks(text):
+    # Yields (start, end, value) for each top-level JSON object or array
+    # embedded in text, left to right. Each balanced span is only decoded if it
+    # isn't inside a block already found; when an outer span isn't valid JSON
+    # its inner spans are tried instead. Only the span itself is decoded (a
+    # JSONDecodeError on the whole text would count every newline before it),
+    # and inner spans containing the offset an outer decode failed at are
+    # skipped: a JSON value parses the same wherever it appears, so they would
+    # fail there too. Each character is thus decoded a bounded number of times.
+    covered_until = 0
+    failures = []
+    for start, end in _bracket_spans(text):
+        if start < covered_until:
+            continue
+        i = bisect_right(failures, start)
+        if i < len(failures) and failures[i] < end:
+            continue
+        try:
+            value, stop = _decoder.raw_decode(text[start:end])
+        except json.JSONDecodeError as e:
+            insort(failures, start + e.pos)
+            continue
+        except (ValueError, RecursionError):
+            continue
+        covered_until = start + stop
+        yield start, start + stop, value
+
+def _unwrap_agent_output(value):
+    # If the value is a stringified Python dict, parse it
+    if isinstance(value, dict) and isinstance(value.get("agent_output"), str):
+        try:
+            inner = ast.literal_eval(value["agent_output"])
+        except (ValueError, SyntaxError):
+            return value
+        if isinstance(inner, (dict, list)):
+            return inner
+    return value
+
+def _tables(value, title=None):
+    # Splits a decoded value into (title, rows) tables. Lists of objects nested
+    # inside an object become tables of their own, titled by their key.
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [(title, value)]
+        return [(title, [{"value": item} for item in value])] if value else []
+    if not isinstance(value, dict):
+        return [(title, [{"value": value}])]
+    nested = []
+    scalars = {}
+    for key, item in value.items():
+        if isinstance(item, list) and item and all(isinstance(row, dict) for row in item):
+            nested.extend(_tables(item, key))
+        else:
+            scalars[key] = item
+    return ([(title, [scalars])] if scalars else []) + nested
+
+def extract_json_segments(text):
+    # Splits a bot message into ("text", None, str) and ("table", title, rows)
+    # segments in their original order
+    segments = []
+    position = 0
+    for start, end, value in iter_json_blocks(text):
+        before = text[position:start].strip()
+        if before:
+            segments.append(("text", None, before))
+        segments.extend(("table", title, rows) for title, rows in _tables(_unwrap_agent_output(value)))
+        position = end
+    rest = text[position:].strip()
+    if rest:
+        segments.append(("text", None, rest))
+    return segments
+
+def extract_json_from_text(text):
+    # Returns (before, rows, after) for the first JSON block, or (text, None, None)
+    for start, end, value in iter_json_blocks(text):
+        value = _unwrap_agent_output(value)
+        rows = [value] if isinstance(value, dict) else value
+        return text[:start].strip(), rows, text[end:].strip()
+    return text, None, None
+
+def make_chat_record(user_msg, bot_msg):
+    # Bot replies are parsed once when they arrive; reruns only render the record
+    return {"user": user_msg, "bot": bot_msg, "segments": extract_json_segments(bot_msg)}
+
+def append_bounded(history, record, limit):
+    history.append(record)
+    if len(history) > limit:
+        del history[:len(history) - limit]
+
+def page_bounds(total, page, page_size):
+    # Page 1 is the most recent page_size messages; returns a [start, end) slice
+    end = max(0, total - (page - 1) * page_size)
+    return max(0, end - page_size), end
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
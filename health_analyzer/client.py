@@ -0,0 +1,348 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from health_analyzer.tracing import span
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+class ApiError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class CircuitOpenError(ApiError):
+    pass
+
+class RateLimitError(ApiError):
+    pass
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures; once reset_timeout has
+    # passed a single trial request is let through (half-open) to probe recovery.
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class RateLimiter:
+    # Token bucket (rate requests/second, bursts of up to burst) combined with a
+    # cap on requests in flight. Callers queue in slot() until both allow them;
+    # rate or max_concurrent None means no limit of that kind.
+    def __init__(self, rate=None, burst=1, max_concurrent=None, window=500):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrent = max_concurrent
+        self.tokens = float(self.burst)
+        self.queued = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.wait_samples = deque(maxlen=window)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _ready(self):
+        tokens_ok = not self.rate or self.tokens >= 1
+        return tokens_ok and (self.max_concurrent is None or self.in_flight < self.max_concurrent)
+
+    def acquire(self, max_wait=None):
+        start = time.monotonic()
+        with self._condition:
+            self.queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._ready():
+                        break
+                    # Sleep until the next token is due or a slot is released
+                    delay = (1 - self.tokens) / self.rate if self.rate and self.tokens < 1 else None
+                    if max_wait is not None:
+                        remaining = start + max_wait - now
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise RateLimitError(f"Still queued after {max_wait:.0f}s; too many requests", 429)
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._condition.wait(delay)
+                if self.rate:
+                    self.tokens -= 1
+                self.in_flight += 1
+                self.wait_samples.append(time.monotonic() - start)
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self, max_wait=None):
+        self.acquire(max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self):
+        with self._condition:
+            waits = sorted(self.wait_samples)
+            queued, in_flight, rejected = self.queued, self.in_flight, self.rejected
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "queued": queued,
+            "in_flight": in_flight,
+            "rejected": rejected,
+            "wait_p50_ms": percentile(0.50) * 1000,
+            "wait_p95_ms": percentile(0.95) * 1000
+        }
+
+class LatencyStats:
+    def __init__(self, window=500):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok, retries):
+        with self._lock:
+            self.count += 1
+            self.retries += retries
+            if not ok:
+                self.errors += 1
+            self.samples.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self.samples)
+            count, errors, retries = self.count, self.errors, self.retries
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": count,
+            "errors": errors,
+            "retries": retries,
+            "p50_ms": percentile(0.50) * 1000,
+            "p95_ms": percentile(0.95) * 1000
+        }
+
+class HttpClient:
+    # One keep-alive connection pool shared by every caller. Timeouts, the
+    # circuit breaker, rate limits and latency stats are tracked per endpoint
+    # URL. requests is only imported when the first request is made.
+    # rate_limits maps a URL to RateLimiter arguments (rate, burst, max_concurrent);
+    # a post() queues at most max_wait seconds for its turn.
+    def __init__(self, timeouts=None, default_timeout=10.0, max_retries=2, backoff=0.5,
+                 pool_maxsize=20, failure_threshold=5, reset_timeout=30.0, rate_limits=None, max_wait=None):
+        self.timeouts = dict(timeouts or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.max_wait = max_wait
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._breakers = {}
+        self._stats = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def _endpoint(self, url):
+        with self._lock:
+            if url not in self._breakers:
+                self._breakers[url] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._stats[url] = LatencyStats()
+                self._limiters[url] = RateLimiter(*self.rate_limits.get(url, ()))
+            return self._breakers[url], self._stats[url], self._limiters[url]
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: uniform in [0, backoff * 2**attempt]
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def post(self, url, payload, timeout=None, idempotent=True, **kwargs):
+        # Waits for the endpoint's rate limiter first; the slot is held through
+        # any retries, which are already spaced out by the backoff.
+        breaker, stats, limiter = self._endpoint(url)
+        with limiter.slot(self.max_wait):
+            return self._post(url, payload, timeout, idempotent, breaker, stats, **kwargs)
+
+    def _post(self, url, payload, timeout, idempotent, breaker, stats, **kwargs):
+        # Connection failures are always retried since the request never reached
+        # the server; read timeouts and retryable statuses only when idempotent.
+        import requests
+
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {url}; try again shortly")
+        timeout = timeout or self.timeouts.get(url, self.default_timeout)
+        start = time.perf_counter()
+        attempt = 0
+        ok = False
+        response = None
+        with span("http.post", url=url) as trace:
+            # Whatever escapes, the outcome is recorded so a half-open trial is
+            # always released
+            try:
+                while True:
+                    response = error = None
+                    try:
+                        response = self.session.post(url, json=payload, timeout=timeout, **kwargs)
+                        retryable = idempotent and response.status_code in RETRY_STATUSES
+                    except requests.ConnectionError as e:
+                        error, retryable = e, True
+                    except requests.Timeout as e:
+                        error, retryable = e, idempotent
+                    except requests.RequestException as e:
+                        # Broken responses, bad URLs, redirect loops: not worth retrying
+                        error, retryable = e, False
+                    if not retryable or attempt >= self.max_retries:
+                        break
+                    self._sleep_before_retry(attempt)
+                    attempt += 1
+                ok = response is not None and response.status_code < 500
+            finally:
+                trace["attempts"] = attempt + 1
+                trace["status"] = response.status_code if response is not None else None
+                stats.record(time.perf_counter() - start, ok, attempt)
+                if ok:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+            if response is None:
+                raise ApiError(f"Request to {url} failed after {attempt + 1} attempt(s): {error}")
+            return response
+
+    def post_json(self, url, payload, **kwargs):
+        response = self.post(url, payload, **kwargs)
+        if not response.ok:
+            raise ApiError(f"Error: {response.status_code} - {response.text}", response.status_code)
+        try:
+            return response.json()
+        except ValueError:
+            raise ApiError(f"Invalid JSON response from {url}", response.status_code)
+
+    def stream_post(self, url, payload, timeout=None, deadline=None):
+        # Yields the response body as text chunks as they arrive. timeout bounds the
+        # connect and the wait for each chunk, deadline the whole response. Never
+        # retried, since part of the response may already have been shown. Not
+        # rate limited: a reply can stream for minutes and would hold a slot.
+        import requests
+
+        breaker, stats, _ = self._endpoint(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {url}; try again shortly")
+        timeout = timeout or self.timeouts.get(url, self.default_timeout)
+        start = time.perf_counter()
+        ok = False
+        with span("http.stream", url=url) as trace:
+            try:
+                try:
+                    response = self.session.post(url, json=payload, timeout=timeout, stream=True)
+                except requests.RequestException as e:
+                    raise ApiError(f"Error connecting to API: {e}")
+                with response:
+                    trace["status"] = response.status_code
+                    if response.status_code != 200:
+                        ok = response.status_code < 500
+                        raise ApiError(f"Error: {response.status_code} - {response.text}", response.status_code)
+                    response.encoding = response.encoding or "utf-8"
+                    try:
+                        for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                            if "first_chunk_ms" not in trace:
+                                trace["first_chunk_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                            if chunk:
+                                yield chunk
+                            if deadline is not None and time.perf_counter() - start > deadline:
+                                raise ApiError(f"Response from {url} exceeded {deadline:.0f}s")
+                    except requests.RequestException as e:
+                        raise ApiError(f"Connection lost while streaming from {url}: {e}")
+                ok = True
+            except GeneratorExit:
+                # Closed early by the consumer (e.g. cancelled), not a backend failure
+                ok = True
+                raise
+            finally:
+                stats.record(time.perf_counter() - start, ok, 0)
+                if ok:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+    def metrics(self):
+        with self._lock:
+            endpoints = list(self._stats)
+        return {
+            url: dict(self._stats[url].snapshot(), state=self._breakers[url].state, **self._limiters[url].snapshot())
+            for url in endpoints
+        }
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
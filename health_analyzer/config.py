@@ -0,0 +1,84 @@
+import os
+
+# Point HEALTH_API_BASE_URL at another deployment (or a local stub) to override
+API_BASE_URL = os.getenv("HEALTH_API_BASE_URL", "https://cts-vibeappso4912-2.azurewebsites.net/api").rstrip("/")
+
+API_URLS = {
+    "Liver disease prediction": f"{API_BASE_URL}/liver-disease/predict",
+    "Heart attack prediction": f"{API_BASE_URL}/heart-attack/predict",
+    "Diabetes prediction": f"{API_BASE_URL}/diabetes-disease/predict"
+}
+
+CHAT_API_URL = f"{API_BASE_URL}/appointment-booking-and-checking"
+
+# Parsed reports and prediction responses are cached in memory by default;
+# set HEALTH_CACHE_DB to a SQLite file path to persist them across restarts.
+CACHE_DB_PATH = os.getenv("HEALTH_CACHE_DB")
+CACHE_MAXSIZE = int(os.getenv("HEALTH_CACHE_MAXSIZE", "512"))
+CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "3600"))
+
+# Per-endpoint request timeouts (seconds) and retry policy for the shared HTTP client
+REQUEST_TIMEOUT = float(os.getenv("HEALTH_REQUEST_TIMEOUT", "10"))
+CHAT_REQUEST_TIMEOUT = float(os.getenv("HEALTH_CHAT_REQUEST_TIMEOUT", "30"))
+REQUEST_TIMEOUTS = dict({url: REQUEST_TIMEOUT for url in API_URLS.values()}, **{CHAT_API_URL: CHAT_REQUEST_TIMEOUT})
+MAX_RETRIES = int(os.getenv("HEALTH_MAX_RETRIES", "2"))
+
+# "remote" sends payloads to API_URLS; "local" scores them in-process with the
+# models in HEALTH_MODEL_DIR (see health_analyzer.predict.load_model for the format)
+PREDICTION_BACKEND = os.getenv("HEALTH_PREDICTION_BACKEND", "remote")
+MODEL_DIR = os.getenv("HEALTH_MODEL_DIR", "models")
+MODEL_NAMES = {
+    "Liver disease prediction": "liver-disease",
+    "Heart attack prediction": "heart-attack",
+    "Diabetes prediction": "diabetes-disease"
+}
+
+# Write JSON-lines trace/timing logs here ("-" for stderr); disabled when unset
+TRACE_LOG = os.getenv("HEALTH_TRACE_LOG")
+
+# Chat messages kept per session and shown per page
+CHAT_HISTORY_LIMIT = int(os.getenv("HEALTH_CHAT_HISTORY_LIMIT", "200"))
+CHAT_PAGE_SIZE = int(os.getenv("HEALTH_CHAT_PAGE_SIZE", "10"))
+
+# Upper bound on a whole streamed chatbot reply, in seconds
+CHAT_STREAM_DEADLINE = float(os.getenv("HEALTH_CHAT_STREAM_DEADLINE", "120"))
+
+# Time budgets (ms) shown in the diagnostics view: the first script run in a
+# process, including the imports it triggers, and every rerun after it
+STARTUP_BUDGET_MS = float(os.getenv("HEALTH_STARTUP_BUDGET_MS", "1500"))
+RERUN_BUDGET_MS = float(os.getenv("HEALTH_RERUN_BUDGET_MS", "150"))
+
+# Pages with less text than OCR_MIN_CHARS (scanned reports) are rendered at
+# OCR_DPI and run through Tesseract via PyMuPDF in a pool of OCR_WORKERS
+# processes. Needs Tesseract installed; set HEALTH_OCR=0 to turn it off.
+OCR_ENABLED = os.getenv("HEALTH_OCR", "1") != "0"
+OCR_LANGUAGE = os.getenv("HEALTH_OCR_LANGUAGE", "eng")
+OCR_DPI = int(os.getenv("HEALTH_OCR_DPI", "300"))
+OCR_WORKERS = int(os.getenv("HEALTH_OCR_WORKERS", "2"))
+OCR_MIN_CHARS = int(os.getenv("HEALTH_OCR_MIN_CHARS", "16"))
+
+# Pair labels with values by their position on the page (table layouts);
+# HEALTH_PDF_LAYOUT=0 falls back to pairing each text line with the next
+PDF_LAYOUT = os.getenv("HEALTH_PDF_LAYOUT", "1") != "0"
+
+# Settings that change what a PDF parses to; part of the parse cache keys
+PARSE_SETTINGS = f"layout={int(PDF_LAYOUT)},ocr={int(OCR_ENABLED)},dpi={OCR_DPI},lang={OCR_LANGUAGE}"
+
+# Largest PDF the HTTP service accepts, in bytes
+MAX_PDF_BYTES = int(os.getenv("HEALTH_MAX_PDF_BYTES", str(20 * 1024 * 1024)))
+
+# Set HEALTH_RESULT_STORE to a SQLite file to file parsed panels and
+# predictions per patient and report date for the Trends view. Off by
+# default: it keeps patient data on disk.
+RESULT_STORE_PATH = os.getenv("HEALTH_RESULT_STORE", "")
+
+# Per prediction endpoint and process: at most HEALTH_API_RATE_LIMIT requests per
+# second (bursts of HEALTH_API_BURST) and HEALTH_API_MAX_CONCURRENT in flight;
+# a call queues up to HEALTH_API_MAX_WAIT seconds. 0 turns a limit off.
+API_RATE_LIMIT = float(os.getenv("HEALTH_API_RATE_LIMIT", "10"))
+API_BURST = int(os.getenv("HEALTH_API_BURST", "20"))
+API_MAX_CONCURRENT = int(os.getenv("HEALTH_API_MAX_CONCURRENT", "8"))
+API_MAX_WAIT = float(os.getenv("HEALTH_API_MAX_WAIT", "30"))
+RATE_LIMITS = {
+    url: (API_RATE_LIMIT or None, API_BURST, API_MAX_CONCURRENT or None) for url in API_URLS.values()
+}
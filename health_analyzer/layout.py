@@ -0,0 +1,187 @@
+import re
+
+from health_analyzer.parser import ALL_PANELS_PARSER
+from health_analyzer.units import UNIT_FACTORS, normalize_unit
+
+# Words further apart than this many line heights belong to different cells
+COLUMN_GAP = 1.0
+# Lines whose vertical centres are within this many line heights form one row
+ROW_TOLERANCE = 0.5
+# Width in points of the x-buckets indexing labels that wait for a value below
+BUCKET_WIDTH = 40.0
+
+UNIT_CELL_RE = re.compile(r"^[a-zA-Zµμ%][\w/^²µμ%.]*$")
+# Header cell of the column holding the results in a table
+RESULT_HEADER_RE = re.compile(r"^(?:test\s+)?(?:results?|values?|observed\s+values?|observations?)$", re.IGNORECASE)
+# A reference range ("<14", ">40", "40 - 60") rather than a result
+REFERENCE_CELL_RE = re.compile(r"^[<>≤≥]|\d\s*[-–]\s*\d")
+KNOWN_UNITS = frozenset(unit for factors in UNIT_FACTORS.values() for unit in factors) | {"%", "years"}
+
+class Cell:
+    __slots__ = ("x0", "x1", "text")
+
+    def __init__(self, x0, x1, text):
+        self.x0 = x0
+        self.x1 = x1
+        self.text = text
+
+def page_rows(words):
+    # Groups PyMuPDF words (x0, y0, x1, y1, text, block, line, word) into rows of
+    # cells, top to bottom. Words arrive grouped by (block, line), so lines are
+    # built in one pass; only the much shorter list of lines is sorted, then
+    # lines at the same height (table columns are often separate blocks) merge.
+    lines = {}
+    for x0, y0, x1, y1, text, block, line, _ in words:
+        entry = lines.get((block, line))
+        if entry is None:
+            lines[(block, line)] = [(y0 + y1) / 2, y1 - y0, [(x0, x1, text)]]
+        else:
+            entry[2].append((x0, x1, text))
+
+    rows = []
+    for y_mid, height, line_words in sorted(lines.values(), key=lambda entry: entry[0]):
+        if rows and abs(y_mid - rows[-1][0]) <= ROW_TOLERANCE * max(height, rows[-1][1]):
+            rows[-1][2].extend(line_words)
+        else:
+            rows.append([y_mid, height, line_words])
+
+    for _, height, row_words in rows:
+        row_words.sort(key=lambda word: word[0])
+        cells = []
+        for x0, x1, text in row_words:
+            if cells and x0 - cells[-1].x1 <= COLUMN_GAP * height:
+                cells[-1].x1 = x1
+                cells[-1].text += " " + text
+            else:
+                cells.append(Cell(x0, x1, text))
+        yield cells
+
+def split_label(text, parser=ALL_PANELS_PARSER):
+    # (label, value) for a cell holding a label, value is "" when the cell has
+    # only the label; (None, text) otherwise. Handles "Label: value",
+    # a bare label and "Label value" where the label is a known lab field.
+    if ":" in text:
+        head, tail = text.split(":", 1)
+        if parser.is_label(head.strip().lower()):
+            return head.strip(), tail.strip()
+    stripped = text.strip()
+    if parser.is_label(stripped.lower()):
+        return stripped, ""
+    words = stripped.split()
+    for count in range(min(parser.max_label_words, len(words) - 1), 0, -1):
+        label = " ".join(words[:count])
+        if parser.is_lab_label(label.lower()):
+            return label, " ".join(words[count:])
+    return None, stripped
+
+def _buckets(x0, x1):
+    return range(int(x0 // BUCKET_WIDTH), int(x1 // BUCKET_WIDTH) + 1)
+
+def layout_lines(words, parser=ALL_PANELS_PARSER):
+    # Pairs labels with values by position in a single pass over the rows and
+    # returns them as alternating label / value lines for ReportParser.parse.
+    # A label takes a cell to its right in the same row, or else the cell below
+    # it in the next row, found through an index of the x-buckets of the labels
+    # still waiting. Once a table header with a result column has been seen,
+    # the cell to the right is the one in that column; before that it is the
+    # first cell that isn't a unit. Only that one cell is tried: it becomes the
+    # value if it converts the way ReportParser would (a number for lab fields
+    # and age), otherwise the label stays unpaired, so a blank or "Not done"
+    # result never takes the reference range printed further right.
+    # The page's last label, if still waiting, is returned last and an
+    # unclaimed cell at the top of the page first, so a label and value split
+    # across pages still pair up as in the text-based flow.
+    lines = []
+    leading = []
+    waiting = {}
+    current = None
+    result_column = None
+    for row_number, cells in enumerate(page_rows(words)):
+        header = _result_column(cells, parser)
+        if header is not None:
+            result_column = header
+            waiting = {}
+            current = None
+            continue
+        still_waiting = {}
+        current = None
+        seen_label = False
+        i = 0
+        while i < len(cells):
+            cell = cells[i]
+            i += 1
+            label, value = split_label(cell.text, parser)
+            if label is not None:
+                seen_label = True
+                if current is not None:
+                    _wait(still_waiting, current)
+                current = None
+                if value:
+                    value, i = _with_unit(value, cells, i, parser)
+                    lines.extend((label, value))
+                else:
+                    current = (cell, label)
+            elif current is not None:
+                if result_column is not None:
+                    middle = (cell.x0 + cell.x1) / 2
+                    if middle < result_column[0]:
+                        continue
+                    candidate = middle <= result_column[1]
+                elif normalize_unit(value) in KNOWN_UNITS:
+                    continue
+                else:
+                    candidate = REFERENCE_CELL_RE.search(value) is None
+                if candidate and parser.accepts(current[1].lower(), value):
+                    value, i = _with_unit(value, cells, i, parser)
+                    lines.extend((current[1], value))
+                current = None
+            else:
+                above = _claim(waiting, cell)
+                if above is not None:
+                    value, i = _with_unit(value, cells, i, parser)
+                    lines.extend((above, value))
+                elif row_number == 0 and not seen_label and not leading:
+                    leading.append(value)
+        if current is not None:
+            _wait(still_waiting, current)
+        waiting = still_waiting
+    return leading + lines + ([current[1]] if current is not None else [])
+
+def _result_column(cells, parser):
+    # (left, right) x-limits of the result column when the row is a table
+    # header: from halfway to the previous header cell to halfway to the next
+    if len(cells) < 2:
+        return None
+    for k, cell in enumerate(cells):
+        if RESULT_HEADER_RE.match(cell.text.strip()):
+            if any(split_label(other.text, parser)[0] is not None for other in cells):
+                return None
+            left = (cells[k - 1].x1 + cell.x0) / 2 if k else float("-inf")
+            right = (cell.x1 + cells[k + 1].x0) / 2 if k + 1 < len(cells) else float("inf")
+            return left, right
+    return None
+
+def _with_unit(value, cells, i, parser):
+    # Appends a unit printed in its own column right after a bare number;
+    # returns the value and the index of the next unread cell
+    if i < len(cells) and value[-1:].isdigit():
+        following = cells[i].text
+        if UNIT_CELL_RE.match(following) and split_label(following, parser)[0] is None:
+            return f"{value} {following}", i + 1
+    return value, i
+
+def _wait(index, entry):
+    cell, _ = entry
+    for bucket in _buckets(cell.x0, cell.x1):
+        index.setdefault(bucket, []).append(entry)
+
+def _claim(index, cell):
+    # The waiting label whose x-range overlaps this cell, removed from the index
+    for bucket in _buckets(cell.x0, cell.x1):
+        for entry in index.get(bucket, ()):
+            label_cell, label = entry
+            if label_cell.x0 <= cell.x1 and cell.x0 <= label_cell.x1:
+                for other in _buckets(label_cell.x0, label_cell.x1):
+                    index[other].remove(entry)
+                return label
+    return None
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from health_analyzer.cache import MISSING, make_cache
+from health_analyzer.config import (
+    CACHE_DB_PATH, CACHE_MAXSIZE, CACHE_TTL, OCR_DPI, OCR_LANGUAGE, OCR_MIN_CHARS, OCR_WORKERS
+)
+from health_analyzer.tracing import span
+
+logger = logging.getLogger("health_analyzer.ocr")
+
+_lock = threading.Lock()
+_state = {"pool": None, "cache": None, "available": None, "inline": OCR_WORKERS <= 0}
+
+def needs_ocr(text):
+    return len(text.strip()) < OCR_MIN_CHARS
+
+def run_inline():
+    # Used as a process pool initializer (see batch.py): its workers already
+    # run in parallel, so they recognize pages themselves instead of each
+    # starting another pool.
+    _state["inline"] = True
+
+def ocr_available():
+    # Checked once per process; without Tesseract, text-less pages stay empty
+    with _lock:
+        if _state["available"] is None:
+            import fitz
+
+            try:
+                fitz.get_tessdata()
+                _state["available"] = True
+            except RuntimeError as e:
+                logger.warning("OCR disabled: %s", e)
+                _state["available"] = False
+        return _state["available"]
+
+def get_cache():
+    # Recognized text per page image, shared by every report in the process
+    with _lock:
+        if _state["cache"] is None:
+            _state["cache"] = make_cache(CACHE_MAXSIZE, CACHE_TTL, CACHE_DB_PATH, table="ocr_cache")
+        return _state["cache"]
+
+def _get_pool():
+    with _lock:
+        if _state["inline"]:
+            return None
+        if _state["pool"] is None:
+            _state["pool"] = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _state["pool"]
+
+def page_image(page, dpi=OCR_DPI):
+    import fitz
+
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes("png")
+
+def recognize_png(png, language=OCR_LANGUAGE):
+    # Runs in a pool worker: OCR the image into a one-page PDF with a text layer
+    import fitz
+
+    with fitz.open("pdf", fitz.Pixmap(png).pdfocr_tobytes(language=language)) as document:
+        return document[0].get_text()
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _store(key, future):
+    if not future.cancelled() and future.exception() is None:
+        get_cache().set(key, future.result())
+
+def start_ocr(page):
+    # Returns a future for the page's text. The rendered image is hashed so a
+    # page seen before (even in another report) is only recognized once.
+    with span("ocr.render", page=page.number):
+        png = page_image(page)
+    key = f"ocr:{OCR_LANGUAGE}:{OCR_DPI}:{hashlib.sha256(png).hexdigest()}"
+    text = get_cache().get(key)
+    if text is not MISSING:
+        return _completed(text)
+    pool = _get_pool()
+    if pool is None:
+        future = Future()
+        try:
+            with span("ocr.recognize", page=page.number):
+                future.set_result(recognize_png(png, OCR_LANGUAGE))
+        except Exception as e:
+            future.set_exception(e)
+    else:
+        future = pool.submit(recognize_png, png, OCR_LANGUAGE)
+    future.add_done_callback(lambda done: _store(key, done))
+    return future
+
+def page_text(future, page_number):
+    # A page that can't be recognized is treated as empty rather than failing the report
+    try:
+        with span("ocr.wait", page=page_number):
+            return future.result()
+    except Exception as e:
+        logger.warning("OCR failed for page %s: %s", page_number, e)
+        return ""
+
+def shutdown():
+    with _lock:
+        if _state["pool"] is not None:
+            _state["pool"].shutdown(cancel_futures=True)
+            _state["pool"] = None
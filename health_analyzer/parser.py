@@ -0,0 +1,187 @@
+import re
+from collections import namedtuple
+
+from health_analyzer.units import conversion_factor
+
+NUMBER_RE = re.compile(r"[\d.]+")
+# Unit written right after a value, e.g. "5.2 mmol/L" or "14 µmol/L (3-17)"
+UNIT_RE = re.compile(r"\s*([a-zA-Zµμ][\w/^²µμ]*)")
+
+# name: key in the parsed results, aliases: lower-cased report labels,
+# unit: unit the prediction API expects, api_key: key in the API payload
+FieldSpec = namedtuple("FieldSpec", ["name", "aliases", "unit", "api_key", "type"])
+
+# section: results key for the panel, patient_keys: patient label prefix -> key
+Panel = namedtuple("Panel", ["disease", "section", "patient_keys", "fields"])
+
+LFT_PANEL = Panel(
+    disease="Liver disease prediction",
+    section="lft_results",
+    patient_keys={"name": "name", "age": "age", "gender": "gender"},
+    fields=(
+        FieldSpec("total_bilirubin", ("total bilirubin",), "mg/dL", "Total_Bilirubin", float),
+        FieldSpec("direct_bilirubin", ("direct bilirubin",), "mg/dL", "Direct_Bilirubin", float),
+        FieldSpec("alkaline_phosphatase", ("alkaline phosphatase",), "U/L", "Alkaline_Phosphotase", float),
+        FieldSpec("sgpt", ("sgpt",), "U/L", "Sgpt", float),
+        FieldSpec("sgot", ("sgot",), "U/L", "Sgot", float),
+        FieldSpec("total_proteins", ("total proteins",), "g/dL", "Total_Proteins", float),
+        FieldSpec("albumin", ("albumin",), "g/dL", "Albumin", float),
+        FieldSpec("albumin_globulin_ratio", ("albumin / globulin ratio",), None, "Albumin_and_Globulin_Ratio", float)
+    )
+)
+
+DIABETES_PANEL = Panel(
+    disease="Diabetes prediction",
+    section="diabetes_results",
+    patient_keys={"name": "Name", "age": "Age", "sex": "Sex"},
+    fields=(
+        FieldSpec("BMI", ("bmi",), "kg/m2", "BMI", float),
+        FieldSpec("BP", ("bp",), "mmHg", "BP", float),
+        FieldSpec("TC", ("tc",), "mg/dL", "TC", float),
+        FieldSpec("LDL", ("ldl",), "mg/dL", "LDL", float),
+        FieldSpec("HDL", ("hdl",), "mg/dL", "HDL", float),
+        FieldSpec("TCH", ("tch",), None, "TCH", float),
+        FieldSpec("LTG", ("ltg",), None, "LTG", float),
+        FieldSpec("GLU", ("glu",), "mg/dL", "GLU", float),
+        FieldSpec("Diabetes_Value", ("diabetes value",), None, "Diabetes_Value", float)
+    )
+)
+
+HEART_PANEL = Panel(
+    disease="Heart attack prediction",
+    section="heart_results",
+    patient_keys={"name": "Name", "age": "Age", "sex": "Sex"},
+    fields=(
+        FieldSpec("LDL", ("ldl",), "mg/dL", "LDL", float),
+        FieldSpec("HDL", ("hdl",), "mg/dL", "HDL", float),
+        FieldSpec("Triglycerides", ("triglycerides",), "mg/dL", "Triglycerides", float),
+        FieldSpec("Fasting_Blood_Sugar", ("fasting blood sugar",), "mg/dL", "Fasting_Blood_Sugar", float),
+        FieldSpec("Complete_Blood_Count", ("complete blood count",), None, "Complete_Blood_Count", float),
+        FieldSpec("Total_Cholesterol", ("total cholesterol",), "mg/dL", "Total_Cholesterol", float),
+        FieldSpec("Non_HDL_Cholesterol", ("non hdl cholesterol",), "mg/dL", "Non_HDL_Cholesterol", float),
+        FieldSpec("C_Reactive_Protein", ("c reactive protein",), "mg/L", "C_Reactive_Protein", float),
+        FieldSpec("Lipoprotein", ("lipoprotein",), "mg/dL", "Lipoprotein", float),
+        FieldSpec("Plasma_Ceramides", ("plasma ceramides",), "umol/L", "Plasma_Ceramides", float),
+        FieldSpec("Natriuretic_Peptides", ("natriuretic peptides",), "pg/mL", "Natriuretic_Peptides", float),
+        FieldSpec("Troponin_T", ("troponin t",), "ng/L", "Troponin_T", float)
+    )
+)
+
+PANELS = (LFT_PANEL, DIABETES_PANEL, HEART_PANEL)
+
+def _parse_measurement(value, api_key):
+    # The number on a value line, converted to the API's unit when the line
+    # states a different one. A unit that isn't known for the field is left
+    # as is; range validation catches values that come out implausible.
+    match = NUMBER_RE.search(value)
+    try:
+        number = float(match.group(0))
+    except (AttributeError, ValueError):
+        return None
+    unit = UNIT_RE.match(value, match.end())
+    if unit is not None:
+        factor = conversion_factor(api_key, unit.group(1))
+        if factor is not None and factor != 1.0:
+            number *= factor
+    return number
+
+def _parse_age(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+# How each patient label prefix converts the line that follows it
+PATIENT_CONVERTERS = {
+    "name": lambda value: value,
+    "age": _parse_age,
+    "gender": str.capitalize,
+    "sex": str.capitalize
+}
+
+class ReportParser:
+    # Extracts one or more panels from the refined report lines in a single pass.
+    # A label line is matched either by prefix (patient information) or by an
+    # exact, case-insensitive dictionary lookup (lab fields); the value is
+    # always taken from the following line.
+    def __init__(self, panels):
+        self.panels = tuple(panels)
+        self._prefixes = {}
+        self._labels = {}
+        for panel in self.panels:
+            for prefix, key in panel.patient_keys.items():
+                self._prefixes.setdefault(prefix, []).append((panel.disease, key))
+            for field in panel.fields:
+                for alias in field.aliases:
+                    self._labels.setdefault(alias, []).append((panel.disease, panel.section, field))
+        self._prefix_tuple = tuple(self._prefixes)
+        self.max_label_words = max((len(alias.split()) for alias in self._labels), default=1)
+
+    def is_label(self, lower):
+        return lower in self._labels or lower.startswith(self._prefix_tuple)
+
+    def is_lab_label(self, lower):
+        return lower in self._labels
+
+    def accepts(self, lower, value):
+        # Whether value is usable for the label, as parse() would convert it
+        if lower in self._labels:
+            return NUMBER_RE.search(value) is not None
+        for prefix in self._prefix_tuple:
+            if lower.startswith(prefix):
+                return PATIENT_CONVERTERS[prefix](value.strip()) is not None
+        return False
+
+    def empty_results(self):
+        return {panel.disease: {"patient_information": {}, panel.section: {}} for panel in self.panels}
+
+    def parse(self, lines, results=None):
+        if results is None:
+            results = self.empty_results()
+        prefixes = self._prefixes
+        prefix_tuple = self._prefix_tuple
+        labels = self._labels
+        count = len(lines)
+        i = 0
+        while i < count:
+            lower = lines[i].strip().lower()
+            if lower.startswith(prefix_tuple):
+                if i + 1 < count:
+                    value = lines[i + 1].strip()
+                    for prefix in prefix_tuple:
+                        if lower.startswith(prefix):
+                            converted = PATIENT_CONVERTERS[prefix](value)
+                            if converted is not None:
+                                for disease, key in prefixes[prefix]:
+                                    results[disease]["patient_information"][key] = converted
+                            break
+                    i += 1
+            else:
+                targets = labels.get(lower)
+                if targets is not None and i + 1 < count:
+                    value = lines[i + 1]
+                    for disease, section, field in targets:
+                        num = _parse_measurement(value, field.api_key)
+                        if num is not None:
+                            results[disease][section][field.name] = field.type(num)
+                    i += 1
+            i += 1
+        return results
+
+PANELS_BY_DISEASE = {panel.disease: panel for panel in PANELS}
+
+# Payload key of the patient's sex for each disease (0/1 in the payload)
+SEX_COLUMNS = {
+    "Liver disease prediction": "Gender",
+    "Diabetes prediction": "Sex",
+    "Heart attack prediction": "Sex"
+}
+
+def payload_columns(disease):
+    # Same keys as the manual-entry json_data for this disease
+    panel = PANELS_BY_DISEASE[disease]
+    return ["Age", SEX_COLUMNS[disease]] + [field.api_key for field in panel.fields]
+
+# Built once at import; reused for every report
+PANEL_PARSERS = {panel.disease: ReportParser([panel]) for panel in PANELS}
+ALL_PANELS_PARSER = ReportParser(PANELS)
@@ -0,0 +1,182 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+from health_analyzer.cache import MISSING, payload_cache_key
+from health_analyzer.client import HttpClient
+from health_analyzer.config import (
+    API_MAX_WAIT, API_URLS, MAX_RETRIES, MODEL_DIR, MODEL_NAMES, RATE_LIMITS, REQUEST_TIMEOUTS
+)
+from health_analyzer.tracing import span
+
+class PredictorError(Exception):
+    pass
+
+class Predictor(ABC):
+    # Common interface for the prediction backends. predict_batch returns one
+    # entry per payload: the result dict, or the exception raised for it.
+    max_workers = 8
+
+    @abstractmethod
+    def endpoint(self, disease):
+        ...
+
+    @abstractmethod
+    def predict(self, disease, payload):
+        ...
+
+    def predict_batch(self, disease, payloads):
+        def safe_predict(payload):
+            try:
+                return self.predict(disease, payload)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(safe_predict, payloads))
+
+class RemotePredictor(Predictor):
+    def __init__(self, client, urls=API_URLS, max_workers=8):
+        self.client = client
+        self.urls = urls
+        self.max_workers = max_workers
+
+    def endpoint(self, disease):
+        return self.urls[disease]
+
+    def predict(self, disease, payload):
+        return self.client.post_json(self.urls[disease], payload)
+
+@lru_cache(maxsize=None)
+def load_model(path):
+    # Loaded once per process and path. A model is a linear classifier stored
+    # as .json or .npz with sklearn-style fields: features, coef, intercept,
+    # classes and optionally mean/scale (StandardScaler) and threshold.
+    import numpy as np
+
+    try:
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                spec = {key: data[key] for key in data.files}
+        else:
+            with open(path) as f:
+                spec = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PredictorError(f"Could not load model {path}: {e}")
+    # A malformed file is reported like an unreadable one rather than failing
+    # later inside predict_batch
+    if not isinstance(spec, dict):
+        raise PredictorError(f"Invalid model {path}: expected a JSON object")
+    try:
+        features = [str(name) for name in np.asarray(spec["features"]).reshape(-1).tolist()]
+        model = {
+            "features": features,
+            "coef": _vector(spec["coef"], len(features), "coef"),
+            "intercept": float(np.asarray(spec.get("intercept", 0.0), dtype=np.float64).reshape(-1)[0]),
+            "mean": _vector(spec.get("mean", np.zeros(len(features))), len(features), "mean"),
+            "scale": _vector(spec.get("scale", np.ones(len(features))), len(features), "scale"),
+            "classes": [str(label) for label in np.asarray(spec.get("classes", ("Negative", "Positive"))).reshape(-1)],
+            "threshold": float(spec.get("threshold", 0.5))
+        }
+    except KeyError as e:
+        raise PredictorError(f"Invalid model {path}: missing field {e.args[0]!r}")
+    except (IndexError, TypeError, ValueError) as e:
+        raise PredictorError(f"Invalid model {path}: {e}")
+    if not features or not model["classes"]:
+        raise PredictorError(f"Invalid model {path}: features and classes must not be empty")
+    return model
+
+def _vector(value, size, name):
+    import numpy as np
+
+    vector = np.asarray(value, dtype=np.float64).reshape(-1)
+    if vector.shape != (size,):
+        raise ValueError(f"{name} has {vector.size} values for {size} features")
+    return vector
+
+class LocalPredictor(Predictor):
+    # Scores payloads in-process with the models found in model_dir, so no
+    # network round trip is needed and it works without internet access.
+    def __init__(self, model_dir=MODEL_DIR, model_names=MODEL_NAMES):
+        self.model_dir = model_dir
+        self.model_names = model_names
+
+    def model_path(self, disease):
+        name = self.model_names[disease]
+        for extension in (".npz", ".json"):
+            path = os.path.join(self.model_dir, name + extension)
+            if os.path.exists(path):
+                return path
+        raise PredictorError(f"No local model for {disease}: expected {name}.npz or {name}.json in {self.model_dir}")
+
+    def endpoint(self, disease):
+        return f"local:{self.model_path(disease)}"
+
+    def predict(self, disease, payload):
+        return self.predict_batch(disease, [payload])[0]
+
+    def predict_batch(self, disease, payloads):
+        if not payloads:
+            return []
+        import numpy as np
+
+        with span("predict.local", disease=disease, rows=len(payloads)):
+            model = load_model(self.model_path(disease))
+            features = model["features"]
+            X = np.array([[payload.get(name, 0.0) for name in features] for payload in payloads], dtype=np.float64)
+            z = ((X - model["mean"]) / model["scale"]) @ model["coef"] + model["intercept"]
+            probabilities = 1.0 / (1.0 + np.exp(-z))
+        negative, positive = model["classes"][0], model["classes"][-1]
+        results = []
+        for probability in probabilities.tolist():
+            label = positive if probability >= model["threshold"] else negative
+            results.append({
+                "prediction": label,
+                "probability": probability,
+                "message": f"Local model: {probability:.1%} probability of {positive}"
+            })
+        return results
+
+def make_client(**overrides):
+    # An HttpClient with the configured timeouts, retries and rate limits;
+    # keyword arguments (e.g. pool_maxsize) replace individual settings
+    settings = {"timeouts": REQUEST_TIMEOUTS, "max_retries": MAX_RETRIES,
+                "rate_limits": RATE_LIMITS, "max_wait": API_MAX_WAIT}
+    settings.update(overrides)
+    return HttpClient(**settings)
+
+def make_predictor(backend, client=None, model_dir=MODEL_DIR):
+    if backend == "local":
+        return LocalPredictor(model_dir)
+    return RemotePredictor(client if client is not None else make_client())
+
+def cached_predict(predictor, cache, coalescer, disease, payload):
+    # The cached result for the payload, else one backend call shared by every
+    # caller asking for the same payload at once (a double-clicked Submit,
+    # another session or request), whose result is then cached
+    key = payload_cache_key(predictor.endpoint(disease), payload)
+    result = cache.get(key)
+    if result is MISSING:
+        result = coalescer.run(key, _predict_and_cache, predictor, cache, key, disease, payload)
+    return result
+
+def _predict_and_cache(predictor, cache, key, disease, payload):
+    result = predictor.predict(disease, payload)
+    cache.set(key, result)
+    return result
+
+def predict_concurrently(predict, payloads, max_workers=None):
+    # Runs predict(disease, payload) for every entry at once and yields
+    # (disease, result, error) in completion order, so total latency is
+    # that of the slowest call rather than the sum.
+    if not payloads:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers or len(payloads)) as pool:
+        futures = {pool.submit(predict, disease, payload): disease for disease, payload in payloads.items()}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
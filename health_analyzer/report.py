@@ -0,0 +1,234 @@
+from collections import deque
+from concurrent.futures import Future
+
+from health_analyzer.config import OCR_ENABLED, OCR_WORKERS, PDF_LAYOUT
+from health_analyzer.layout import layout_lines
+from health_analyzer.ocr import needs_ocr, ocr_available, page_text, start_ocr
+from health_analyzer.parser import ALL_PANELS_PARSER, PANEL_PARSERS, PANELS
+from health_analyzer.tracing import span
+
+def open_pdf(source):
+    # Uploads are opened straight from memory; anything else is treated as a path.
+    # PyMuPDF is imported here so pages that never read a PDF don't pay for it.
+    import fitz
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def iter_pdf_pages(source, ocr=OCR_ENABLED, layout=False):
+    # Yields each page's text or, with layout=True, its label/value lines
+    # paired by position (see layout.py); OCRed pages always come back as text.
+    # Pages without a text layer are sent for OCR in the background and later
+    # pages keep being read; up to OCR_WORKERS of them are in flight at once
+    # and pages are still yielded in order. A page is yielded as soon as it and
+    # those before it are resolved: inline OCR (batch workers) and cached pages
+    # finish straight away, so nothing is held back for them.
+    with span("pdf.open"):
+        pdf_document = open_pdf(source)
+    pending = deque()
+    try:
+        with pdf_document:
+            for page in pdf_document:
+                with span("pdf.extract_page", page=page.number, layout=layout):
+                    if layout:
+                        words = page.get_text("words")
+                        text = "".join(word[4] for word in words)
+                        content = layout_lines(words)
+                    else:
+                        text = content = page.get_text()
+                if ocr and needs_ocr(text) and ocr_available():
+                    pending.append((page.number, start_ocr(page)))
+                else:
+                    pending.append((page.number, content))
+                while pending and (_ready(pending[0][1]) or len(pending) > max(OCR_WORKERS, 1)):
+                    yield _resolve(*pending.popleft())
+        while pending:
+            yield _resolve(*pending.popleft())
+    finally:
+        # Stopped early: OCR of pages nobody will read is cancelled if not started
+        for _, item in pending:
+            if isinstance(item, Future):
+                item.cancel()
+
+def _ready(item):
+    return not isinstance(item, Future) or item.done()
+
+def _resolve(page_number, item):
+    return page_text(item, page_number) if isinstance(item, Future) else item
+
+def extract_text_from_pdf(pdf_path):
+    return "".join(iter_pdf_pages(pdf_path))
+
+def refine_medical_report(raw_list):
+    refined_list = []
+    for item in raw_list:
+        if ':' in item:
+            # Split only on the first colon to handle cases like "Name: ABC"
+            parts = item.split(':', 1)
+            refined_list.extend([part.strip() for part in parts])
+        else:
+            refined_list.append(item.strip())
+    return refined_list
+
+def _parse_panel(disease, lines):
+    return PANEL_PARSERS[disease].parse(lines)[disease]
+
+def parse_all_panels(lines):
+    # Extracts every panel in one pass; returns {disease: parsed_json}
+    return ALL_PANELS_PARSER.parse(lines)
+
+def _number(value):
+    # None for a field the parser didn't find, so validation reports it missing
+    return None if value is None else float(value)
+
+def _is_male(sex):
+    return None if sex is None else 1.0 if str(sex).lower() == "male" else 0.0
+
+def convert_lft_to_api_json(parsed_json):
+    patient = parsed_json.get("patient_information", {})
+    lft = parsed_json.get("lft_results", {})
+    return {
+        "Prediction_Type": "Liver disease prediction",
+        "Age": _number(patient.get("age")),
+        "Gender": _is_male(patient.get("gender")),
+        "Total_Bilirubin": _number(lft.get("total_bilirubin")),
+        "Direct_Bilirubin": _number(lft.get("direct_bilirubin")),
+        "Alkaline_Phosphotase": _number(lft.get("alkaline_phosphatase")),
+        "Sgpt": _number(lft.get("sgpt")),
+        "Sgot": _number(lft.get("sgot")),
+        "Total_Proteins": _number(lft.get("total_proteins")),
+        "Albumin": _number(lft.get("albumin")),
+        "Albumin_and_Globulin_Ratio": _number(lft.get("albumin_globulin_ratio"))
+    }
+
+def parse_liver_function_test(lines):
+    return _parse_panel("Liver disease prediction", lines)
+
+def parse_diabetes_report(lines):
+    return _parse_panel("Diabetes prediction", lines)
+
+def convert_diabetes_to_api_json(parsed_json):
+    patient = parsed_json.get("patient_information", {})
+    diabetes_results = parsed_json.get("diabetes_results", {})
+    return {
+        "Prediction_Type": "Diabetes prediction",
+        "Age": _number(patient.get("Age")),
+        "Sex": _is_male(patient.get("Sex")),
+        "BMI": _number(diabetes_results.get("BMI")),
+        "BP": _number(diabetes_results.get("BP")),
+        "TC": _number(diabetes_results.get("TC")),
+        "LDL": _number(diabetes_results.get("LDL")),
+        "HDL": _number(diabetes_results.get("HDL")),
+        "TCH": _number(diabetes_results.get("TCH")),
+        "LTG": _number(diabetes_results.get("LTG")),
+        "GLU": _number(diabetes_results.get("GLU")),
+        "Diabetes_Value": _number(diabetes_results.get("Diabetes_Value"))
+    }
+
+def parse_heart_attack_report(lines):
+    return _parse_panel("Heart attack prediction", lines)
+
+def convert_heart_attack_to_api_json(parsed_json):
+    patient = parsed_json.get("patient_information", {})
+    heart_results = parsed_json.get("heart_results", {})
+    return {
+        "Prediction_Type": "Heart attack prediction",
+        "Age": _number(patient.get("Age")),
+        "Sex": _is_male(patient.get("Sex")),
+        "LDL": _number(heart_results.get("LDL")),
+        "HDL": _number(heart_results.get("HDL")),
+        "Triglycerides": _number(heart_results.get("Triglycerides")),
+        "Fasting_Blood_Sugar": _number(heart_results.get("Fasting_Blood_Sugar")),
+        "Complete_Blood_Count": _number(heart_results.get("Complete_Blood_Count")),
+        "Total_Cholesterol": _number(heart_results.get("Total_Cholesterol")),
+        "Non_HDL_Cholesterol": _number(heart_results.get("Non_HDL_Cholesterol")),
+        "C_Reactive_Protein": _number(heart_results.get("C_Reactive_Protein")),
+        "Lipoprotein": _number(heart_results.get("Lipoprotein")),
+        "Plasma_Ceramides": _number(heart_results.get("Plasma_Ceramides")),
+        "Natriuretic_Peptides": _number(heart_results.get("Natriuretic_Peptides")),
+        "Troponin_T": _number(heart_results.get("Troponin_T"))
+    }
+
+def report_lines(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return refine_medical_report(lines)
+
+PARSERS = {
+    "Liver disease prediction": (parse_liver_function_test, convert_lft_to_api_json),
+    "Diabetes prediction": (parse_diabetes_report, convert_diabetes_to_api_json),
+    "Heart attack prediction": (parse_heart_attack_report, convert_heart_attack_to_api_json)
+}
+
+# Fields each parser must find before the remaining pages can be skipped
+REQUIRED_FIELDS = {
+    panel.disease: {
+        "patient_information": tuple(key for prefix, key in panel.patient_keys.items() if prefix != "name"),
+        panel.section: tuple(field.name for field in panel.fields)
+    }
+    for panel in PANELS
+}
+
+def is_complete(parsed_json, required):
+    return all(
+        field in parsed_json.get(section, {})
+        for section, fields in required.items()
+        for field in fields
+    )
+
+def _parse_pages(source, parser, stop_early, layout=PDF_LAYOUT):
+    results = parser.empty_results()
+    carry = []
+    pages = iter_pdf_pages(source, layout=layout)
+    try:
+        for page in pages:
+            # Keep the previous page's last line so a label at the bottom of one
+            # page still pairs with its value at the top of the next.
+            with span("report.refine"):
+                lines = carry + (page if isinstance(page, list) else report_lines(page))
+            carry = lines[-1:]
+            with span("report.parse", lines=len(lines)):
+                parser.parse(lines, results)
+            if stop_early and all(is_complete(results[d], REQUIRED_FIELDS[d]) for d in results):
+                break
+    finally:
+        pages.close()
+    return results
+
+def parse_report(source, disease, stop_early=True, layout=PDF_LAYOUT):
+    return _parse_pages(source, PANEL_PARSERS[disease], stop_early, layout)[disease]
+
+def parse_report_all_panels(source, stop_early=True, layout=PDF_LAYOUT):
+    return _parse_pages(source, ALL_PANELS_PARSER, stop_early, layout)
+
+# A panel is only worth sending for prediction once this share of its lab fields was found
+MIN_PANEL_COVERAGE = 0.5
+
+def ready_payloads(parsed_by_disease, min_coverage=MIN_PANEL_COVERAGE):
+    payloads = {}
+    for panel in PANELS:
+        parsed_json = parsed_by_disease.get(panel.disease)
+        if not parsed_json:
+            continue
+        found = len(parsed_json.get(panel.section, {}))
+        if found and found >= min_coverage * len(panel.fields):
+            _, convert = PARSERS[panel.disease]
+            with span("report.convert", disease=panel.disease):
+                payloads[panel.disease] = convert(parsed_json)
+    return payloads
+
+def patient_name(parsed_json):
+    # The name printed on the report, "" when none was found
+    patient = parsed_json.get("patient_information", {})
+    for panel in PANELS:
+        name = patient.get(panel.patient_keys.get("name"))
+        if name:
+            return str(name)
+    return ""
+
+def process_report(source, disease):
+    # (payload, patient name) for one report
+    _, convert = PARSERS[disease]
+    parsed_json = parse_report(source, disease)
+    with span("report.convert", disease=disease):
+        return convert(parsed_json), patient_name(parsed_json)
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import sys
+from functools import lru_cache
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from health_analyzer.cache import MISSING, Coalescer, make_cache, pdf_cache_key
+from health_analyzer.client import ApiError, CircuitOpenError, RateLimitError
+from health_analyzer.config import (
+    CACHE_DB_PATH, CACHE_MAXSIZE, CACHE_TTL, MAX_PDF_BYTES, MODEL_DIR, MODEL_NAMES, PREDICTION_BACKEND,
+    TRACE_LOG
+)
+from health_analyzer.predict import (
+    PredictorError, cached_predict, make_client, make_predictor, predict_concurrently
+)
+from health_analyzer.report import PARSERS, parse_report, parse_report_all_panels, ready_payloads
+from health_analyzer.tracing import configure_logging, span, tracer
+from health_analyzer.units import validate_payload
+
+# URL slugs for the diseases, e.g. /predict/liver-disease
+DISEASES = {slug: disease for disease, slug in MODEL_NAMES.items()}
+
+class RequestError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+# Built lazily once per worker process, so forked/spawned workers each get
+# their own connection pool instead of sharing one created at import time.
+@lru_cache(maxsize=None)
+def get_client():
+    return make_client()
+
+def prediction_backend():
+    # Read at call time so the --backend/--model-dir flags of main() also reach
+    # a single in-process worker, whose config module was imported before them
+    return (os.getenv("HEALTH_PREDICTION_BACKEND", PREDICTION_BACKEND),
+            os.getenv("HEALTH_MODEL_DIR", MODEL_DIR))
+
+@lru_cache(maxsize=None)
+def get_predictor():
+    backend, model_dir = prediction_backend()
+    return make_predictor(backend, client=get_client(), model_dir=model_dir)
+
+@lru_cache(maxsize=None)
+def get_caches():
+    return {
+        "Analyzed reports": make_cache(CACHE_MAXSIZE, CACHE_TTL, CACHE_DB_PATH, table="analyze_cache"),
+        "Predictions": make_cache(CACHE_MAXSIZE, CACHE_TTL, CACHE_DB_PATH, table="prediction_cache")
+    }
+
+@lru_cache(maxsize=None)
+def get_coalescer():
+    return Coalescer()
+
+def resolve_disease(slug):
+    if slug not in DISEASES:
+        raise RequestError(f"Unknown disease {slug!r}; expected one of {', '.join(sorted(DISEASES))}", 404)
+    return DISEASES[slug]
+
+def predict(disease, payload):
+    return cached_predict(get_predictor(), get_caches()["Predictions"], get_coalescer(), disease, payload)
+
+def analyze_report(data, disease=None, run_prediction=False):
+    # Parses one PDF for a single disease, or for every panel it contains when
+    # disease is None, and optionally predicts each resulting payload.
+    cache = get_caches()["Analyzed reports"]
+    key = pdf_cache_key(data, disease or "all", namespace="payload")
+    payloads = cache.get(key)
+    if payloads is MISSING:
+        try:
+            if disease is None:
+                payloads = ready_payloads(parse_report_all_panels(data))
+            else:
+                _, convert = PARSERS[disease]
+                payloads = {disease: convert(parse_report(data, disease))}
+        except Exception as e:
+            raise RequestError(f"Could not read PDF: {e}", 422)
+        cache.set(key, payloads)
+
+    result = {"payloads": {MODEL_NAMES[name]: payload for name, payload in payloads.items()}, "flags": {}}
+    valid = {}
+    rejected = {}
+    for name, payload in payloads.items():
+        errors, flags = validate_payload(name, payload)
+        if flags:
+            result["flags"][MODEL_NAMES[name]] = flags
+        if errors:
+            rejected[MODEL_NAMES[name]] = "Not sent for prediction: " + "; ".join(errors)
+        else:
+            valid[name] = payload
+    if run_prediction:
+        result["predictions"] = {}
+        result["errors"] = rejected
+        for name, prediction, error in predict_concurrently(predict, valid):
+            if error is None:
+                result["predictions"][MODEL_NAMES[name]] = prediction
+            else:
+                result["errors"][MODEL_NAMES[name]] = str(error)
+    return result
+
+async def read_body(request, limit):
+    # Rejects an oversized upload from its Content-Length, or else stops
+    # reading once the limit is passed, instead of buffering all of it first
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > limit:
+        raise RequestError(f"PDF larger than {limit} bytes", 413)
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise RequestError(f"PDF larger than {limit} bytes", 413)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def error_response(error):
+    if isinstance(error, RequestError):
+        status = error.status_code
+    elif isinstance(error, RateLimitError):
+        status = 429
+    elif isinstance(error, CircuitOpenError):
+        status = 503
+    elif isinstance(error, ApiError):
+        status = 502
+    else:
+        status = 503
+    return JSONResponse({"error": str(error)}, status_code=status)
+
+async def analyze(request):
+    # POST /analyze[?disease=<slug>][&predict=1] with the PDF as the raw body
+    try:
+        disease = request.query_params.get("disease")
+        disease = resolve_disease(disease) if disease else None
+        data = await read_body(request, MAX_PDF_BYTES)
+        if not data:
+            raise RequestError("Request body must be a PDF document")
+        run_prediction = request.query_params.get("predict", "0").lower() in ("1", "true", "yes")
+        with span("service.analyze", disease=disease, bytes=len(data)):
+            # Parsing is CPU-bound; keep it off the event loop
+            result = await run_in_threadpool(analyze_report, data, disease, run_prediction)
+    except (RequestError, ApiError, PredictorError) as e:
+        return error_response(e)
+    return JSONResponse(result)
+
+async def predict_endpoint(request):
+    # POST /predict/<slug> with the API payload as a JSON object
+    try:
+        disease = resolve_disease(request.path_params["disease"])
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            raise RequestError("Request body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise RequestError("Request body must be a JSON object")
+        # Same payload shape as manual entry and bulk scoring send
+        payload = dict(payload, Prediction_Type=disease)
+        errors, _ = validate_payload(disease, payload)
+        if errors:
+            raise RequestError("Not sent for prediction: " + "; ".join(errors), 422)
+        with span("service.predict", disease=disease):
+            result = await run_in_threadpool(predict, disease, payload)
+    except (RequestError, ApiError, PredictorError) as e:
+        return error_response(e)
+    return JSONResponse(result)
+
+async def health(request):
+    return JSONResponse({"status": "ok", "backend": prediction_backend()[0], "pid": os.getpid()})
+
+async def metrics(request):
+    caches = get_caches()
+    return JSONResponse({
+        "pid": os.getpid(),
+        "spans": tracer.summary(),
+        "api": get_client().metrics(),
+        "coalescer": get_coalescer().stats(),
+        "caches": {name: cache.stats() for name, cache in caches.items()}
+    })
+
+def create_app():
+    if TRACE_LOG:
+        configure_logging(TRACE_LOG)
+    return Starlette(routes=[
+        Route("/analyze", analyze, methods=["POST"]),
+        Route("/predict/{disease}", predict_endpoint, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"])
+    ])
+
+app = create_app()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the report pipeline over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--backend", choices=["remote", "local"], default=PREDICTION_BACKEND)
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Model directory for the local backend")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    # Workers are separate processes that import this module afresh, so the
+    # settings are handed over through the environment
+    os.environ["HEALTH_PREDICTION_BACKEND"] = args.backend
+    os.environ["HEALTH_MODEL_DIR"] = args.model_dir
+    uvicorn.run("health_analyzer.service:app", host=args.host, port=args.port, workers=args.workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
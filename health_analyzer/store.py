@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from health_analyzer.tracing import span
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS patients ("
+    "id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, name TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS reports ("
+    "id INTEGER PRIMARY KEY, patient_id INTEGER NOT NULL REFERENCES patients (id), "
+    "taken_on TEXT NOT NULL, disease TEXT NOT NULL, fingerprint TEXT NOT NULL, prediction TEXT, "
+    "message TEXT, source TEXT, created REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS reports_patient ON reports (patient_id, taken_on)",
+    # The same panel saved again (a resubmitted report) updates its row
+    "CREATE UNIQUE INDEX IF NOT EXISTS reports_unique ON reports (patient_id, taken_on, disease, fingerprint)",
+    # One row per lab value. The primary key doubles as the per-patient trend
+    # index and, WITHOUT ROWID, stores the rows in that order, so a trend is a
+    # single range scan that reads nothing but the requested fields.
+    "CREATE TABLE IF NOT EXISTS results ("
+    "patient_id INTEGER NOT NULL, field TEXT NOT NULL, taken_on TEXT NOT NULL, "
+    "report_id INTEGER NOT NULL, value REAL NOT NULL, "
+    "PRIMARY KEY (patient_id, field, taken_on, report_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS results_field ON results (field, taken_on, value)"
+)
+
+# Payload keys that are not lab values
+NON_RESULT_KEYS = {"Prediction_Type", "Age", "Gender", "Sex"}
+
+def patient_key(name):
+    return " ".join(str(name).split()).lower()
+
+def payload_fingerprint(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResultStore:
+    # Parsed panels and predictions per patient and report date, in SQLite.
+    # Dates are ISO strings (YYYY-MM-DD) so they sort and range-compare as text.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-65536")
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+    def _patient_id(self, name):
+        self._conn.execute("INSERT OR IGNORE INTO patients (key, name) VALUES (?, ?)",
+                           (patient_key(name), " ".join(str(name).split())))
+        return self._find_patient(name)
+
+    def _find_patient(self, name):
+        row = self._conn.execute("SELECT id FROM patients WHERE key = ?", (patient_key(name),)).fetchone()
+        return None if row is None else row[0]
+
+    def save_reports(self, records):
+        # records: dicts with patient, taken_on, disease, payload and optionally
+        # prediction (the API response) and source. Written in one transaction;
+        # returns the report ids. A payload already saved for the patient, date
+        # and panel keeps its report id and gets the latest prediction.
+        report_ids = []
+        with span("store.save", reports=len(records)), self._lock, self._conn:
+            for record in records:
+                patient_id = self._patient_id(record["patient"])
+                prediction = record.get("prediction") or {}
+                key = (patient_id, str(record["taken_on"]), record["disease"], payload_fingerprint(record["payload"]))
+                self._conn.execute(
+                    "INSERT INTO reports (patient_id, taken_on, disease, fingerprint, prediction, message, source, "
+                    "created) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (patient_id, taken_on, disease, fingerprint) DO UPDATE SET "
+                    "prediction = excluded.prediction, message = excluded.message, "
+                    "source = coalesce(excluded.source, source), created = excluded.created",
+                    key + (prediction.get("prediction"), prediction.get("message"), record.get("source"), time.time())
+                )
+                report_id = self._conn.execute(
+                    "SELECT id FROM reports WHERE patient_id = ? AND taken_on = ? AND disease = ? AND fingerprint = ?",
+                    key
+                ).fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO results (patient_id, field, taken_on, report_id, value) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(patient_id, field, str(record["taken_on"]), report_id, float(value))
+                     for field, value in record["payload"].items()
+                     if field not in NON_RESULT_KEYS and isinstance(value, (int, float))]
+                )
+                report_ids.append(report_id)
+        return report_ids
+
+    def save_report(self, patient, taken_on, disease, payload, prediction=None, source=None):
+        return self.save_reports([{"patient": patient, "taken_on": taken_on, "disease": disease,
+                                   "payload": payload, "prediction": prediction, "source": source}])[0]
+
+    def patients(self, search="", limit=100):
+        # Patient names, most recently added first
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM patients WHERE key LIKE ? ORDER BY id DESC LIMIT ?",
+                (f"%{patient_key(search)}%", limit)
+            ).fetchall()
+        return [name for name, in rows]
+
+    def fields(self, patient):
+        # Distinct fields recorded for a patient. Walks the primary key one field
+        # at a time (a skip scan) instead of reading every row of the patient.
+        fields = []
+        with self._lock:
+            patient_id = self._find_patient(patient)
+            if patient_id is None:
+                return fields
+            field = ""
+            while True:
+                found = self._conn.execute(
+                    "SELECT field FROM results WHERE patient_id = ? AND field > ? ORDER BY field LIMIT 1",
+                    (patient_id, field)
+                ).fetchone()
+                if found is None:
+                    return fields
+                field = found[0]
+                fields.append(field)
+
+    def trend(self, patient, fields, start=None, end=None):
+        # [(taken_on, field, value)] for one patient, ordered by field and date
+        if not fields:
+            return []
+        placeholders = ", ".join("?" * len(fields))
+        query = f"SELECT taken_on, field, value FROM results WHERE patient_id = ? AND field IN ({placeholders})"
+        params = list(fields)
+        if start is not None:
+            query += " AND taken_on >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND taken_on <= ?"
+            params.append(str(end))
+        with span("store.trend", fields=len(fields)), self._lock:
+            patient_id = self._find_patient(patient)
+            if patient_id is None:
+                return []
+            return self._conn.execute(query + " ORDER BY field, taken_on", [patient_id, *params]).fetchall()
+
+    def field_values(self, field, start=None, end=None, limit=None):
+        # [(taken_on, patient, value)] for one field across patients, by date
+        query = ("SELECT r.taken_on, p.name, r.value FROM results r JOIN patients p ON p.id = r.patient_id "
+                 "WHERE r.field = ?")
+        params = [field]
+        if start is not None:
+            query += " AND r.taken_on >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND r.taken_on <= ?"
+            params.append(str(end))
+        query += " ORDER BY r.taken_on"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with span("store.field_values", field=field), self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def reports(self, patient, limit=100):
+        # [(taken_on, disease, prediction, message, source)], newest first
+        with self._lock:
+            patient_id = self._find_patient(patient)
+            if patient_id is None:
+                return []
+            return self._conn.execute(
+                "SELECT taken_on, disease, prediction, message, source FROM reports WHERE patient_id = ? "
+                "ORDER BY taken_on DESC, id DESC LIMIT ?",
+                (patient_id, limit)
+            ).fetchall()
+
+    def stats(self):
+        with self._lock:
+            return {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("patients", "reports")}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,112 @@
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("health_analyzer.trace")
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(target, level=logging.INFO):
+    # target is a file path, or "-" for stderr. Safe to call on every rerun.
+    package_logger = logging.getLogger("health_analyzer")
+    if any(getattr(handler, "_health_analyzer", False) for handler in package_logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr) if target == "-" else logging.FileHandler(target)
+    handler.setFormatter(JsonLinesFormatter())
+    handler._health_analyzer = True
+    package_logger.addHandler(handler)
+    package_logger.setLevel(level)
+
+class SpanStats:
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+class Tracer:
+    # Collects span durations per name in bounded windows so percentiles
+    # reflect recent behaviour without unbounded memory growth.
+    def __init__(self, window=2000):
+        self.window = window
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **fields):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield fields
+        except GeneratorExit:
+            # A traced generator closed early by its consumer
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.record(name, duration, error is not None)
+            if logger.isEnabledFor(logging.INFO):
+                extra = dict(fields, span=name, duration_ms=round(duration * 1000, 3))
+                if error is not None:
+                    extra["error"] = repr(error)
+                logger.info(name, extra={"fields": extra})
+
+    def record(self, name, duration, error=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats(self.window)
+            stats.count += 1
+            stats.total += duration
+            stats.samples.append(duration)
+            if error:
+                stats.errors += 1
+
+    def summary(self):
+        import numpy as np
+
+        with self._lock:
+            items = [(name, stats.count, stats.errors, stats.total, list(stats.samples))
+                     for name, stats in self._stats.items()]
+        rows = []
+        for name, count, errors, total, samples in sorted(items):
+            p50, p95, p99 = (np.percentile(samples, [50, 95, 99]) * 1000).tolist() if samples else (0.0, 0.0, 0.0)
+            rows.append({
+                "span": name,
+                "count": count,
+                "errors": errors,
+                "mean_ms": total / count * 1000 if count else 0.0,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99
+            })
+        return rows
+
+    def samples(self, name):
+        with self._lock:
+            stats = self._stats.get(name)
+            return list(stats.samples) if stats else []
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+tracer = Tracer()
+span = tracer.span
@@ -0,0 +1,189 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# Multipliers from a unit (lower-cased, without spaces) to the unit the
+# prediction API expects for a field, i.e. FieldSpec.unit.
+_BILIRUBIN = {"mg/dl": 1.0, "umol/l": 1 / 17.1, "mg/l": 0.1}
+_ENZYME = {"u/l": 1.0, "iu/l": 1.0, "ukat/l": 60.0}
+_PROTEIN = {"g/dl": 1.0, "g/l": 0.1}
+_CHOLESTEROL = {"mg/dl": 1.0, "mmol/l": 38.67}
+_TRIGLYCERIDES = {"mg/dl": 1.0, "mmol/l": 88.57}
+_GLUCOSE = {"mg/dl": 1.0, "mmol/l": 18.016}
+
+UNIT_FACTORS = {
+    "Total_Bilirubin": _BILIRUBIN,
+    "Direct_Bilirubin": _BILIRUBIN,
+    "Alkaline_Phosphotase": _ENZYME,
+    "Sgpt": _ENZYME,
+    "Sgot": _ENZYME,
+    "Total_Proteins": _PROTEIN,
+    "Albumin": _PROTEIN,
+    "BMI": {"kg/m2": 1.0, "kg/m^2": 1.0, "kg/m²": 1.0},
+    "BP": {"mmhg": 1.0, "kpa": 7.50062},
+    "TC": _CHOLESTEROL,
+    "LDL": _CHOLESTEROL,
+    "HDL": _CHOLESTEROL,
+    "Total_Cholesterol": _CHOLESTEROL,
+    "Non_HDL_Cholesterol": _CHOLESTEROL,
+    "Triglycerides": _TRIGLYCERIDES,
+    "GLU": _GLUCOSE,
+    "Fasting_Blood_Sugar": _GLUCOSE,
+    "C_Reactive_Protein": {"mg/l": 1.0, "mg/dl": 10.0},
+    "Lipoprotein": {"mg/dl": 1.0, "mg/l": 0.1, "g/l": 100.0},
+    "Plasma_Ceramides": {"umol/l": 1.0, "nmol/ml": 1.0, "nmol/l": 0.001},
+    "Natriuretic_Peptides": {"pg/ml": 1.0, "ng/l": 1.0},
+    "Troponin_T": {"ng/l": 1.0, "pg/ml": 1.0, "ng/ml": 1000.0, "ug/l": 1000.0}
+}
+
+# normal_low/normal_high: typical adult reference interval, None when open or
+# not meaningful; low/high: plausibility limits, anything outside is treated as
+# a parsing or entry error. Both in the API's units.
+ReferenceRange = namedtuple("ReferenceRange", ["normal_low", "normal_high", "low", "high"])
+
+REFERENCE_RANGES = {
+    "Age": ReferenceRange(None, None, 1, 120),
+    "Gender": ReferenceRange(None, None, 0, 1),
+    "Sex": ReferenceRange(None, None, 0, 1),
+    "Total_Bilirubin": ReferenceRange(0.1, 1.2, 0.05, 80),
+    "Direct_Bilirubin": ReferenceRange(None, 0.3, 0.01, 40),
+    "Alkaline_Phosphotase": ReferenceRange(44, 147, 10, 3000),
+    "Sgpt": ReferenceRange(7, 56, 1, 10000),
+    "Sgot": ReferenceRange(8, 48, 1, 10000),
+    "Total_Proteins": ReferenceRange(6.0, 8.3, 2, 15),
+    "Albumin": ReferenceRange(3.5, 5.0, 0.5, 7),
+    "Albumin_and_Globulin_Ratio": ReferenceRange(1.0, 2.5, 0.1, 5),
+    "BMI": ReferenceRange(18.5, 24.9, 10, 80),
+    "BP": ReferenceRange(70, 100, 40, 200),
+    "TC": ReferenceRange(None, 200, 50, 1000),
+    "LDL": ReferenceRange(None, 100, 5, 600),
+    "HDL": ReferenceRange(40, None, 5, 200),
+    "TCH": ReferenceRange(None, 5, 0.5, 20),
+    "LTG": ReferenceRange(None, None, 1, 10),
+    "GLU": ReferenceRange(70, 99, 20, 1000),
+    "Diabetes_Value": ReferenceRange(None, None, 0, 1000),
+    "Triglycerides": ReferenceRange(None, 150, 10, 5000),
+    "Fasting_Blood_Sugar": ReferenceRange(70, 99, 20, 1000),
+    "Complete_Blood_Count": ReferenceRange(None, None, 0, None),
+    "Total_Cholesterol": ReferenceRange(None, 200, 50, 1000),
+    "Non_HDL_Cholesterol": ReferenceRange(None, 130, 10, 1000),
+    "C_Reactive_Protein": ReferenceRange(None, 3, 0, 500),
+    "Lipoprotein": ReferenceRange(None, 30, 0, 500),
+    "Plasma_Ceramides": ReferenceRange(None, None, 0, 50),
+    "Natriuretic_Peptides": ReferenceRange(None, 100, 0, 100000),
+    "Troponin_T": ReferenceRange(None, 14, 0, 100000)
+}
+
+def normalize_unit(unit):
+    return unit.strip().lower().replace(" ", "").replace("µ", "u").replace("μ", "u")
+
+def conversion_factor(api_key, unit):
+    # None when the unit isn't known for this field; no unit means the API's unit
+    if not unit:
+        return 1.0
+    return UNIT_FACTORS.get(api_key, {}).get(normalize_unit(unit))
+
+def normalize_values(api_key, values, units):
+    # Converts a whole column to the API's unit. units is one unit for every
+    # value or a sequence with one per value (None, NaN or "" for the API's unit);
+    # values in an unknown unit become NaN so validation rejects them.
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    if units is None or isinstance(units, str):
+        factor = conversion_factor(api_key, units)
+        return values * (np.nan if factor is None else factor)
+    labels, inverse = np.unique([unit if isinstance(unit, str) else "" for unit in units], return_inverse=True)
+    factors = np.array([conversion_factor(api_key, label) for label in labels], dtype=np.float64)
+    return values * factors[inverse.reshape(values.shape)]
+
+@lru_cache(maxsize=None)
+def _limits(columns):
+    import numpy as np
+
+    def column(attribute, missing):
+        return np.array([
+            missing if getattr(REFERENCE_RANGES[name], attribute) is None else getattr(REFERENCE_RANGES[name], attribute)
+            for name in columns
+        ], dtype=np.float64)
+
+    return (column("low", -np.inf), column("high", np.inf),
+            column("normal_low", -np.inf), column("normal_high", np.inf))
+
+def check_values(columns, values):
+    # values is a (rows, len(columns)) float array in the API's units. Returns
+    # boolean arrays of the same shape: missing (NaN; the convert_* functions
+    # emit None for fields the parser didn't find), implausible, and
+    # below/above the reference interval.
+    import numpy as np
+
+    low, high, normal_low, normal_high = _limits(tuple(columns))
+    missing = np.isnan(values)
+    implausible = ~missing & ((values < low) | (values > high))
+    in_range = ~(missing | implausible)
+    return {
+        "missing": missing,
+        "implausible": implausible,
+        "low": in_range & (values < normal_low),
+        "high": in_range & (values > normal_high)
+    }
+
+def _reference(limits):
+    if limits.normal_low is None:
+        return f"<{limits.normal_high:g}"
+    if limits.normal_high is None:
+        return f">{limits.normal_low:g}"
+    return f"{limits.normal_low:g}-{limits.normal_high:g}"
+
+def describe_row(columns, units, values, masks, row):
+    # (errors, flags) messages for one row of check_values' output
+    errors = []
+    flags = []
+    for i, name in enumerate(columns):
+        limits = REFERENCE_RANGES[name]
+        value = f"{values[row, i]:g}" + (f" {units[i]}" if units[i] else "")
+        if masks["missing"][row, i]:
+            errors.append(f"{name} missing")
+        elif masks["implausible"][row, i]:
+            bounds = f">= {limits.low:g}" if limits.high is None else f"{limits.low:g}-{limits.high:g}"
+            errors.append(f"{name} {value} outside plausible range {bounds}")
+        elif masks["low"][row, i] or masks["high"][row, i]:
+            level = "low" if masks["low"][row, i] else "high"
+            flags.append(f"{name} {value} {level} (reference {_reference(limits)})")
+    return errors, flags
+
+def payload_units(disease):
+    # The API's unit for each of payload_columns(disease), None where unitless.
+    # Imported here because the parser itself uses conversion_factor.
+    from health_analyzer.parser import PANELS_BY_DISEASE, payload_columns
+
+    api_units = {field.api_key: field.unit for field in PANELS_BY_DISEASE[disease].fields}
+    return [api_units.get(name) for name in payload_columns(disease)]
+
+def validate_payloads(disease, payloads):
+    # Checks a batch of API payloads in one vectorized pass before anything is
+    # sent. Returns one (errors, flags) pair per payload; only payloads without
+    # errors should be submitted.
+    import numpy as np
+    from health_analyzer.parser import payload_columns
+
+    if not payloads:
+        return []
+    columns = payload_columns(disease)
+    units = payload_units(disease)
+    values = np.array([[_as_float(payload.get(name)) for name in columns] for payload in payloads],
+                      dtype=np.float64)
+    masks = check_values(columns, values)
+    flagged = np.flatnonzero(np.logical_or.reduce([mask.any(axis=1) for mask in masks.values()]))
+    results = [([], []) for _ in payloads]
+    for row in flagged.tolist():
+        results[row] = describe_row(columns, units, values, masks, row)
+    return results
+
+def validate_payload(disease, payload):
+    return validate_payloads(disease, [payload])[0]
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
@@ -1,256 +1,145 @@
 import streamlit as st
-import requests
-import fitz
-import re
-import json
-import pandas as pd
-from streamlit.components.v1 import html
-
-API_URLS = {
-    "Liver disease prediction": "https://cts-vibeappso4912-2.azurewebsites.net/api/liver-disease/predict",
-    "Heart attack prediction": "https://cts-vibeappso4912-2.azurewebsites.net/api/heart-attack/predict",
-    "Diabetes prediction": "https://cts-vibeappso4912-2.azurewebsites.net/api/diabetes-disease/predict"
-}
-
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    try:
-        with fitz.open(pdf_path) as pdf_document:
-            for page in pdf_document:
-                text += page.get_text()
-    except Exception as e:
-        st.error(f"An error occurred while reading the PDF: {e}")
-    return text
-
-def refine_medical_report(raw_list):
-    refined_list = []
-    for item in raw_list:
-        if ':' in item:
-            # Split only on the first colon to handle cases like "Name: ABC"
-            parts = item.split(':', 1)
-            refined_list.extend([part.strip() for part in parts])
-        else:
-            refined_list.append(item.strip())
-    return refined_list
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
 
-def convert_lft_to_api_json(parsed_json):
-    patient = parsed_json.get("patient_information", {})
-    lft = parsed_json.get("lft_results", {})
-    return {
-        "Prediction_Type": "Liver disease prediction",
-        "Age": float(patient.get("age", 0)),
-        "Gender": 1.0 if str(patient.get("gender", "")).lower() == "male" else 0.0,
-        "Total_Bilirubin": float(lft.get("total_bilirubin", 0)),
-        "Direct_Bilirubin": float(lft.get("direct_bilirubin", 0)),
-        "Alkaline_Phosphotase": float(lft.get("alkaline_phosphatase", 0)),
-        "Sgpt": float(lft.get("sgpt", 0)),
-        "Sgot": float(lft.get("sgot", 0)),
-        "Total_Proteins": float(lft.get("total_proteins", 0)),
-        "Albumin": float(lft.get("albumin", 0)),
-        "Albumin_and_Globulin_Ratio": float(lft.get("albumin_globulin_ratio", 0))
-    }
+# Taken before the package imports so that a cold start includes them
+run_started = time.perf_counter()
 
-def parse_liver_function_test(lines):
-    results = {
-        "patient_information": {},
-        "lft_results": {}
-    }
-    lft_keys = {
-        "total bilirubin": "total_bilirubin",
-        "direct bilirubin": "direct_bilirubin",
-        "alkaline phosphatase": "alkaline_phosphatase",
-        "sgpt": "sgpt",
-        "sgot": "sgot",
-        "total proteins": "total_proteins",
-        "albumin": "albumin",
-        "albumin / globulin ratio": "albumin_globulin_ratio"
-    }
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        lower = line.lower()
-        if lower.startswith("name"):
-            if i+1 < len(lines):
-                results["patient_information"]["name"] = lines[i+1].strip()
-                i += 1
-        elif lower.startswith("age"):
-            if i+1 < len(lines):
-                try:
-                    results["patient_information"]["age"] = int(lines[i+1].strip())
-                except ValueError:
-                    pass
-                i += 1
-        elif lower.startswith("gender"):
-            if i+1 < len(lines):
-                results["patient_information"]["gender"] = lines[i+1].strip().capitalize()
-                i += 1
-        else:
-            for key in lft_keys:
-                if lower == key:
-                    if i+1 < len(lines):
-                        value = lines[i+1].strip()
-                        try:
-                            num = float(re.findall(r"[\d.]+", value)[0])
-                        except Exception:
-                            num = None
-                        if num is not None:
-                            results["lft_results"][lft_keys[key]] = num
-                        i += 1
-        i += 1
-    return results
-
-def parse_diabetes_report(lines):
-    results = {
-        "patient_information": {},
-        "diabetes_results": {}
-    }
-    diabetes_keys = {
-        "age": "Age",
-        "sex": "Sex",
-        "bmi": "BMI",
-        "bp": "BP",
-        "tc": "TC",
-        "ldl": "LDL",
-        "hdl": "HDL",
-        "tch": "TCH",
-        "ltg": "LTG",
-        "glu": "GLU",
-        "diabetes value": "Diabetes_Value"
-    }
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        lower = line.lower()
-        if lower.startswith("name"):
-            if i+1 < len(lines):
-                results["patient_information"]["Name"] = lines[i+1].strip()
-                i += 1
-        elif lower.startswith("age"):
-            if i+1 < len(lines):
-                try:
-                    results["patient_information"]["Age"] = int(lines[i+1].strip())
-                except ValueError:
-                    pass
-                i += 1
-        elif lower.startswith("sex"):
-            if i+1 < len(lines):
-                results["patient_information"]["Sex"] = lines[i+1].strip().capitalize()
-                i += 1
-        else:
-            for key in diabetes_keys:
-                if lower == key:
-                    if i+1 < len(lines):
-                        value = lines[i+1].strip()
-                        try:
-                            num = float(re.findall(r"[\d.]+", value)[0])
-                        except Exception:
-                            num = None
-                        if num is not None:
-                            results["diabetes_results"][diabetes_keys[key]] = num
-                        i += 1
-        i += 1
-    return results
-
-def convert_diabetes_to_api_json(parsed_json):
-    patient = parsed_json.get("patient_information", {})
-    diabetes_results = parsed_json.get("diabetes_results", {})
-    return {
-        "Prediction_Type": "Diabetes prediction",
-        "Age": patient.get("Age", 0),
-        "Sex": 1.0 if str(patient.get("Sex")).lower() == "male" else 0.0,
-        "BMI": diabetes_results.get("BMI", 0.0),
-        "BP": diabetes_results.get("BP", 0.0),
-        "TC": diabetes_results.get("TC", 0.0),
-        "LDL": diabetes_results.get("LDL", 0.0),
-        "HDL": diabetes_results.get("HDL", 0.0),
-        "TCH": diabetes_results.get("TCH", 0.0),
-        "LTG": diabetes_results.get("LTG", 0.0),
-        "GLU": diabetes_results.get("GLU", 0.0),
-        "Diabetes_Value": diabetes_results.get("Diabetes_Value", 0.0)
-    }
+# Heavy modules (PyMuPDF, pandas, NumPy, requests) are imported on the pages
+# that use them; anything imported once stays loaded for later reruns.
+from health_analyzer.cache import MISSING, Coalescer, make_cache, pdf_cache_key
+from health_analyzer.chat import append_bounded, make_chat_record, page_bounds, page_count
+from health_analyzer.client import ApiError
+from health_analyzer.config import (
+    API_MAX_CONCURRENT,
+    API_MAX_WAIT,
+    API_RATE_LIMIT,
+    CACHE_DB_PATH,
+    CACHE_MAXSIZE,
+    CACHE_TTL,
+    CHAT_API_URL,
+    CHAT_HISTORY_LIMIT,
+    CHAT_PAGE_SIZE,
+    CHAT_STREAM_DEADLINE,
+    MODEL_DIR,
+    PREDICTION_BACKEND,
+    RERUN_BUDGET_MS,
+    RESULT_STORE_PATH,
+    STARTUP_BUDGET_MS,
+    TRACE_LOG,
+)
+from health_analyzer.ocr import get_cache as get_ocr_cache
+from health_analyzer.predict import PredictorError, cached_predict, make_client, make_predictor, predict_concurrently
+from health_analyzer.store import ResultStore
+from health_analyzer.tracing import configure_logging, span, tracer
+from health_analyzer.units import validate_payload
 
-def parse_heart_attack_report(lines):
-    results = {
-        "patient_information": {},
-        "heart_results": {}
-    }
-    heart_keys = {
-        "ldl": "LDL",
-        "hdl": "HDL",
-        "triglycerides": "Triglycerides",
-        "fasting blood sugar": "Fasting_Blood_Sugar",
-        "complete blood count": "Complete_Blood_Count",
-        "total cholesterol": "Total_Cholesterol",
-        "non hdl cholesterol": "Non_HDL_Cholesterol",
-        "c reactive protein": "C_Reactive_Protein",
-        "lipoprotein": "Lipoprotein",
-        "plasma ceramides": "Plasma_Ceramides",
-        "natriuretic peptides": "Natriuretic_Peptides",
-        "troponin t": "Troponin_T"
-    }
-     
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        lower = line.lower()
-        if lower.startswith("name"):
-            if i+1 < len(lines):
-                results["patient_information"]["Name"] = lines[i+1].strip()
-                i += 1
-        elif lower.startswith("age"):
-            if i+1 < len(lines):
-                try:
-                    results["patient_information"]["Age"] = int(lines[i+1].strip())
-                except ValueError:
-                    pass
-                i += 1
-        elif lower.startswith("sex"):
-            if i+1 < len(lines):
-                results["patient_information"]["Sex"] = lines[i+1].strip().capitalize()
-                i += 1
-        else:
-            for key in heart_keys:
-                if lower == key:
-                    if i+1 < len(lines):
-                        value = lines[i+1].strip()
-                        try:
-                            num = float(re.findall(r"[\d.]+", value)[0])
-                        except Exception:
-                            num = None
-                        if num is not None:
-                            results["heart_results"][heart_keys[key]] = num
-                        i += 1
-        i += 1
-    return results
-
-def convert_heart_attack_to_api_json(parsed_json):
-    patient = parsed_json.get("patient_information", {})
-    heart_results = parsed_json.get("heart_results", {})
+if TRACE_LOG:
+    configure_logging(TRACE_LOG)
+logger = logging.getLogger("health_analyzer.app")
+
+@st.cache_resource
+def get_caches():
+    # Shared by every session in this process
     return {
-        "Prediction_Type": "Heart attack prediction",
-        "Age": patient.get("Age", 0),
-        "Sex": 1.0 if str(patient.get("Sex")).lower() == "male" else 0.0,
-        "LDL": heart_results.get("LDL", 0.0),
-        "HDL": heart_results.get("HDL", 0.0),
-        "Triglycerides": heart_results.get("Triglycerides", 0.0),
-        "Fasting_Blood_Sugar": heart_results.get("Fasting_Blood_Sugar", 0.0),
-        "Complete_Blood_Count": heart_results.get("Complete_Blood_Count", 0.0),
-        "Total_Cholesterol": heart_results.get("Total_Cholesterol", 0.0),
-        "Non_HDL_Cholesterol": heart_results.get("Non_HDL_Cholesterol", 0.0),
-        "C_Reactive_Protein": heart_results.get("C_Reactive_Protein", 0.0),
-        "Lipoprotein": heart_results.get("Lipoprotein", 0.0),
-        "Plasma_Ceramides": heart_results.get("Plasma_Ceramides", 0.0),
-        "Natriuretic_Peptides": heart_results.get("Natriuretic_Peptides", 0.0),
-        "Troponin_T": heart_results.get("Troponin_T", 0.0)
+        "Parsed reports": make_cache(CACHE_MAXSIZE, CACHE_TTL, CACHE_DB_PATH, table="parse_cache"),
+        "Predictions": make_cache(CACHE_MAXSIZE, CACHE_TTL, CACHE_DB_PATH, table="prediction_cache"),
+        "OCR pages": get_ocr_cache()
     }
 
+@st.cache_resource
+def get_client():
+    # Keeps the connection pool, circuit breakers, rate limits and latency stats
+    # across reruns; shared by every session, so the limits are per process
+    return make_client()
+
+@st.cache_resource
+def get_coalescer():
+    return Coalescer()
+
+@st.cache_resource
+def get_predictor(backend):
+    # Local models are loaded on first use and then stay in memory for the process
+    return make_predictor(backend, client=get_client(), model_dir=MODEL_DIR)
+
+@st.cache_resource
+def get_startup():
+    # Filled in by the first script run of this process
+    return {"cold_start_ms": None, "page": None}
+
+@st.cache_resource
+def get_store():
+    # One connection for the process; None when HEALTH_RESULT_STORE is empty
+    return ResultStore(RESULT_STORE_PATH) if RESULT_STORE_PATH else None
+
+caches = get_caches()
+client = get_client()
+coalescer = get_coalescer()
+store = get_store()
+
+BACKENDS = {"Remote API": "remote", "Local model": "local"}
+# Set from the sidebar on every run; a plain global so worker threads can read it
+prediction_backend = PREDICTION_BACKEND
+
+def predict(disease, json_data):
+    return cached_predict(get_predictor(prediction_backend), caches["Predictions"], coalescer, disease, json_data)
+
+def submit_prediction(disease, json_data):
+    # Missing and implausible values are caught here instead of by the API
+    errors, flags = validate_payload(disease, json_data)
+    if flags:
+        st.info("Outside the reference range: " + "; ".join(flags))
+    if errors:
+        st.error("Not sent for prediction: " + "; ".join(errors))
+        return None
+    try:
+        return predict(disease, json_data)
+    except (ApiError, PredictorError) as e:
+        st.error(f"Prediction request failed: {e}")
+        return None
+
+def save_results(records):
+    # Files predicted panels under their patient for the Trends view; records
+    # without a patient (manual entry with no name given) are not kept
+    records = [record for record in records if record["patient"]]
+    if store is not None and records:
+        store.save_reports(records)
+
+def parse_uploaded_report(uploaded_file, disease):
+    from health_analyzer.report import parse_report
+
+    data = uploaded_file.getbuffer()
+    key = pdf_cache_key(data, disease)
+    parsed_json = caches["Parsed reports"].get(key)
+    if parsed_json is MISSING:
+        with st.spinner("Reading report (scanned pages are OCRed in the background)..."):
+            parsed_json = parse_report(data, disease)
+        caches["Parsed reports"].set(key, parsed_json)
+    return parsed_json
+
+def parse_uploaded_report_all_panels(uploaded_file):
+    from health_analyzer.report import parse_report_all_panels
+
+    data = uploaded_file.getbuffer()
+    key = pdf_cache_key(data, ANALYZE_EVERYTHING)
+    parsed = caches["Parsed reports"].get(key)
+    if parsed is MISSING:
+        with st.spinner("Reading report (scanned pages are OCRed in the background)..."):
+            parsed = parse_report_all_panels(data)
+        caches["Parsed reports"].set(key, parsed)
+    return parsed
+
 # Sidebar menu options
 diseases = [
     "Liver disease prediction",
     "Heart attack prediction",
     "Diabetes prediction"
 ]
+ANALYZE_EVERYTHING = "Analyze everything"
 
 st.set_page_config(page_title="Health Support App", layout="wide")
 
@@ -258,26 +147,90 @@ st.set_page_config(page_title="Health Support App", layout="wide")
 with st.sidebar:
     st.title("Health Support App")
     st.markdown("---")
-    page = st.radio("Choose view:", ["Prediction", "Chatbot"], key="main_toggle")
+    views = ["Prediction", "Chatbot"]
+    if store is not None:
+        views.append("Trends")
+    # Hidden unless the app is opened with ?diagnostics=1
+    if st.query_params.get("diagnostics") == "1":
+        views.append("Diagnostics")
+    page = st.radio("Choose view:", views, key="main_toggle")
     st.markdown("---")
     if page == "Prediction":
-        selected_disease = st.selectbox("Select Prediction Type", diseases)
+        selected_disease = st.selectbox("Select Prediction Type", diseases + [ANALYZE_EVERYTHING])
+        backend_label = st.radio("Prediction backend", list(BACKENDS), index=int(PREDICTION_BACKEND == "local"))
+        prediction_backend = BACKENDS[backend_label]
+        patient_input = ""
+        report_date = None
+        if store is not None:
+            patient_input = st.text_input("Patient", help="Results are saved under this name for the Trends view; "
+                                                          "defaults to the name on an uploaded report")
+            report_date = st.date_input("Report date")
+            st.caption(f"Predicted results are saved to {RESULT_STORE_PATH}.")
     else:
         selected_disease = None
+    st.markdown("---")
+    cache_stats = st.empty()
 
 # Main content area
 if page == "Prediction":
-    if selected_disease:
+    from health_analyzer.report import PARSERS, patient_name, ready_payloads
+
+    if selected_disease == ANALYZE_EVERYTHING:
+        st.markdown(f"## {ANALYZE_EVERYTHING}")
+        st.subheader("Upload Blood Test Report (PDF)")
+        st.caption("Every panel found in the report is sent for prediction at the same time.")
+        uploaded_file = st.file_uploader("Choose a PDF file", type=["pdf"], key="pdf_uploader_all")
+        if st.button("Submit", key="submit_all") and uploaded_file is not None:
+            try:
+                parsed = parse_uploaded_report_all_panels(uploaded_file)
+                payloads = ready_payloads(parsed)
+            except Exception as e:
+                st.error(f"An error occurred while reading the PDF: {e}")
+                parsed = payloads = {}
+            patient = patient_input or next(filter(None, map(patient_name, parsed.values())), "")
+            if not payloads:
+                st.warning("No panel in this report has enough values for a prediction.")
+            else:
+                # One slot per panel so each result renders as soon as it arrives
+                slots = {}
+                valid = {}
+                for disease, column in zip(payloads, st.columns(len(payloads))):
+                    with column:
+                        st.subheader(disease)
+                        slots[disease] = st.empty()
+                        errors, flags = validate_payload(disease, payloads[disease])
+                        if errors:
+                            slots[disease].error("Not sent for prediction: " + "; ".join(errors))
+                        else:
+                            valid[disease] = payloads[disease]
+                            slots[disease].info("Waiting for prediction...")
+                        if flags:
+                            st.caption("Outside the reference range: " + "; ".join(flags))
+                records = []
+                for disease, result, error in predict_concurrently(predict, valid):
+                    with slots[disease].container():
+                        if error:
+                            st.error(f"Prediction request failed: {error}")
+                        else:
+                            st.markdown(f"**Prediction:** {result.get('prediction', '')}")
+                            st.markdown(f"**Message:** {result.get('message', '')}")
+                            records.append({"patient": patient, "taken_on": report_date, "disease": disease,
+                                            "payload": valid[disease], "prediction": result,
+                                            "source": uploaded_file.name})
+                save_results(records)
+    elif selected_disease:
         # Main Body
         st.markdown(f"## {selected_disease}")
 
         api_under_development = []
         option = st.radio(
                 "Choose input method:",
-                ("Upload blood test report", "Enter blood parameters")
+                ("Upload blood test report", "Upload multiple reports (batch)", "Upload CSV/Parquet (bulk)", "Enter blood parameters")
             )
 
         prediction_result = None
+        patient = patient_input
+        source = None
         if selected_disease in api_under_development:
             st.warning(f"API for {selected_disease} is under development.")
             st.button("Submit", key="submit_disabled", disabled=True)
@@ -311,8 +264,7 @@ if page == "Prediction":
                             "Albumin": ALB,
                             "Albumin_and_Globulin_Ratio": AG_Ratio
                         }
-                        response = requests.post(API_URLS[selected_disease], json=json_data)
-                        prediction_result = response.json()
+                        prediction_result = submit_prediction(selected_disease, json_data)
                 elif selected_disease == "Heart attack prediction":
                     Age = st.number_input("Age", min_value=0)
                     Sex = st.selectbox("Sex", ["Male", "Female"])
@@ -346,8 +298,7 @@ if page == "Prediction":
                             "Natriuretic_Peptides": Natriuretic_Peptides,
                             "Troponin_T": Troponin_T
                         }
-                        response = requests.post(API_URLS[selected_disease], json=json_data)
-                        prediction_result = response.json()
+                        prediction_result = submit_prediction(selected_disease, json_data)
                 elif selected_disease == "Diabetes prediction":
                     Age = st.number_input("Age", min_value=0)
                     Sex = st.selectbox("Sex", ["Male", "Female"])
@@ -375,8 +326,7 @@ if page == "Prediction":
                             "GLU": GLU,
                             "Diabetes_Value": Diabetes_Value
                         }
-                        response = requests.post(API_URLS[selected_disease], json=json_data)
-                        prediction_result = response.json()
+                        prediction_result = submit_prediction(selected_disease, json_data)
             # Case 2: PDF Upload
             elif option == "Upload blood test report":
                 st.subheader("Upload Blood Test Report (PDF)")
@@ -384,44 +334,113 @@ if page == "Prediction":
                 if uploaded_file is not None:
                     st.success("File uploaded successfully!")
                 if st.button("Submit", key="submit_pdf") and uploaded_file is not None:
-                    with open("temp_report.pdf", "wb") as f:
-                        f.write(uploaded_file.read())
-                    extracted_text = extract_text_from_pdf("temp_report.pdf")
-                    lines = [line.strip() for line in extracted_text.split('\n') if line.strip()]
-                    lines = refine_medical_report(lines)
-                    if selected_disease == "Liver disease prediction":
-                        parsed_json = parse_liver_function_test(lines)
-                        json_data = convert_lft_to_api_json(parsed_json)
-                        print(json_data)
-                    elif selected_disease == "Diabetes prediction":
-                        parsed_json = parse_diabetes_report(lines)
-                        json_data = convert_diabetes_to_api_json(parsed_json)
-                        print(json_data)
-                    elif selected_disease == "Heart attack prediction":
-                        parsed_json = parse_heart_attack_report(lines)
-                        json_data = convert_heart_attack_to_api_json(parsed_json)
-                        print(json_data)
+                    json_data = None
+                    if selected_disease in PARSERS:
+                        _, convert = PARSERS[selected_disease]
+                        try:
+                            # Parse straight from the upload buffer, stopping once every field is found
+                            with span("pipeline.upload", disease=selected_disease):
+                                parsed_json = parse_uploaded_report(uploaded_file, selected_disease)
+                                with span("report.convert", disease=selected_disease):
+                                    json_data = convert(parsed_json)
+                            patient = patient_input or patient_name(parsed_json)
+                            source = uploaded_file.name
+                            logger.debug("payload", extra={"fields": {"payload": json_data}})
+                        except Exception as e:
+                            st.error(f"An error occurred while reading the PDF: {e}")
                     else:
                         st.warning("PDF parsing for this disease is not implemented.")
-                        json_data = None
                     if json_data:
-                        response = requests.post(API_URLS[selected_disease], json=json_data)
-                        prediction_result = response.json()
+                        prediction_result = submit_prediction(selected_disease, json_data)
+
+            # Case 3: Batch PDF Upload
+            elif option == "Upload multiple reports (batch)":
+                st.subheader("Upload Blood Test Reports (PDF)")
+                uploaded_files = st.file_uploader(
+                    "Choose PDF files", type=["pdf"], accept_multiple_files=True, key="pdf_batch_uploader"
+                )
+                if st.button("Submit", key="submit_batch") and uploaded_files:
+                    import pandas as pd
+                    from health_analyzer.batch import process_reports, throughput
+
+                    sources = [(f.name, f.getvalue()) for f in uploaded_files]
+                    progress = st.progress(0.0)
+                    table = st.empty()
+                    rows = []
+                    start = time.perf_counter()
+                    records = []
+                    for result in process_reports(sources, selected_disease):
+                        row = {"Report": result["name"], "Prediction": "", "Message": result["error"] or "", "Flags": ""}
+                        if result["payload"]:
+                            errors, flags = validate_payload(selected_disease, result["payload"])
+                            row["Flags"] = "; ".join(flags)
+                            if errors:
+                                row["Message"] = "Not sent: " + "; ".join(errors)
+                            else:
+                                try:
+                                    prediction = predict(selected_disease, result["payload"])
+                                    row["Prediction"] = prediction.get("prediction", "")
+                                    row["Message"] = prediction.get("message", "")
+                                    # Filed under the name on each report; the sidebar's patient
+                                    # only covers reports without one
+                                    records.append({"patient": result["patient"] or patient_input,
+                                                    "taken_on": report_date, "disease": selected_disease,
+                                                    "payload": result["payload"], "prediction": prediction,
+                                                    "source": result["name"]})
+                                except Exception as e:
+                                    row["Message"] = f"Prediction failed: {e}"
+                        rows.append(row)
+                        progress.progress(len(rows) / len(sources))
+                        table.dataframe(pd.DataFrame(rows), width="stretch")
+                    save_results(records)
+                    elapsed = time.perf_counter() - start
+                    st.success(
+                        f"Processed {len(rows)} reports in {elapsed:.2f}s "
+                        f"({throughput(len(rows), elapsed):.2f} reports/sec)"
+                    )
+
+            # Case 4: Bulk CSV/Parquet scoring
+            elif option == "Upload CSV/Parquet (bulk)":
+                from health_analyzer.bulk import ResultWriter, payload_columns, predict_file
+
+                st.subheader("Upload Blood Parameters (CSV or Parquet)")
+                st.caption("Required columns: " + ", ".join(payload_columns(selected_disease)))
+                table_file = st.file_uploader("Choose a file", type=["csv", "parquet"], key="bulk_uploader")
+                if st.button("Submit", key="submit_bulk") and table_file is not None:
+                    # Results go to a temporary file so memory stays flat however
+                    # many rows there are; the session's previous one is removed
+                    previous = st.session_state.pop("bulk_output", None)
+                    if previous and os.path.exists(previous):
+                        os.remove(previous)
+                    with tempfile.NamedTemporaryFile(prefix="predictions-", suffix=".csv", delete=False) as output:
+                        output_path = st.session_state.bulk_output = output.name
+                    writer = ResultWriter(output_path)
+                    status = st.empty()
+                    start = time.perf_counter()
+                    try:
+                        predictor = get_predictor(prediction_backend)
+                        for chunk in predict_file(predictor, table_file, selected_disease):
+                            writer.write(chunk)
+                            status.info(f"{writer.rows} rows scored...")
+                        elapsed = time.perf_counter() - start
+                        status.success(f"Scored {writer.rows} rows in {elapsed:.2f}s")
+                        # Read from disk only when the download is requested
+                        st.download_button("Download results", lambda: Path(output_path).read_bytes(),
+                                           file_name="predictions.csv", mime="text/csv")
+                    except (ValueError, PredictorError) as e:
+                        status.error(str(e))
 
         # Output bar for prediction
         st.markdown("---")
         st.subheader("Prediction Output")
         if prediction_result:
+            save_results([{"patient": patient, "taken_on": report_date, "disease": selected_disease,
+                           "payload": json_data, "prediction": prediction_result, "source": source}])
             st.markdown(f"**Prediction:** {prediction_result.get('prediction', '')}")
             # st.markdown(f"**Probability:** {prediction_result.get('probability', 0):.3f}")
             st.markdown(f"**Message:** {prediction_result.get('message', '')}")
 
 elif page == "Chatbot":
-    import json
-    import re
-    import pandas as pd
-    import ast # For safely evaluating Python literals
-
     st.markdown("---")
     st.title("Welcome to Your AI Assistant")
     st.subheader("Smart Appointment Assistant Chat")
@@ -430,76 +449,182 @@ elif page == "Chatbot":
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
 
-    # def extract_json_from_text(text):
-    #     # Find JSON array or object in the text
-    #     match = re.search(r'(\[.*?\]|\{.*?\})', text, re.DOTALL)
-    #     if match:
-    #         json_str = match.group(1)
-    #         try:
-    #             data = json.loads(json_str)
-    #             if isinstance(data, dict):
-    #                 data = [data]
-    #             # Get text before and after JSON
-    #             before = text[:match.start()].strip()
-    #             after = text[match.end():].strip()
-    #             return before, data, after
-    #         except Exception:
-    #             pass
-    #     return text, None, None
-    
-    def extract_json_from_text(text):
-    # Find JSON array or object in the text
-        match = re.search(r'(\[.*?\]|\{.*?\})', text, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-            try:
-                data = json.loads(json_str)
-                # If the value is a stringified Python dict, parse it
-                if isinstance(data, dict) and "agent_output" in data:
-                    try:
-                        inner_data = ast.literal_eval(data["agent_output"])
-                        if isinstance(inner_data, dict):
-                            data = [inner_data]
-                    except Exception:
-                        pass
-                elif isinstance(data, dict):
-                    data = [data]
-                before = text[:match.start()].strip()
-                after = text[match.end():].strip()
-                return before, data, after
-            except Exception:
-                pass
-        return text, None, None
-
-    for i, (user_msg, bot_msg) in enumerate(st.session_state.chat_history):
-        st.markdown(f"**You:** {user_msg}")
-        before, json_data, after = extract_json_from_text(bot_msg)
-        if json_data:
-            if before:
-                st.markdown(f"**Bot:** {before}")
-            st.table(pd.DataFrame(json_data))
-            if after:
-                st.markdown(f"**Bot:** {after}")
-        else:
-            st.markdown(f"**Bot:** {bot_msg}")
-    
+    # Only the selected page of history is rendered, and tables are built for it alone
+    history = st.session_state.chat_history
+    # A reply still streaming when the last run was interrupted (Cancel or a new
+    # message) is kept with the text received so far
+    interrupted = st.session_state.pop("chat_stream", None)
+    if interrupted is not None:
+        append_bounded(history, make_chat_record(interrupted["user"], interrupted["text"] + " _(cancelled)_"),
+                       CHAT_HISTORY_LIMIT)
+    pages = page_count(len(history), CHAT_PAGE_SIZE)
+    chat_page = 1
+    if pages > 1:
+        chat_page = st.number_input("History page (1 = latest)", min_value=1, max_value=pages, value=1)
+    start, end = page_bounds(len(history), chat_page, CHAT_PAGE_SIZE)
+    if pages > 1:
+        st.caption(f"Showing messages {start + 1}-{end} of {len(history)}")
+    for record in history[start:end]:
+        st.markdown(f"**You:** {record['user']}")
+        if not record["segments"]:
+            st.markdown(f"**Bot:** {record['bot']}")
+        for kind, title, content in record["segments"]:
+            if kind == "text":
+                st.markdown(f"**Bot:** {content}")
+            else:
+                import pandas as pd
+
+                if title:
+                    st.caption(title)
+                st.table(pd.DataFrame(content))
+
     def handle_chat_input():
         user_input = st.session_state.chat_input
         if user_input:
-            ## Replace with actual API Url
-            api_url = "https://cts-vibeappso4912-2.azurewebsites.net/api/appointment-booking-and-checking"
-            payload = {"user_query": user_input}
-            try:
-                response = requests.post(api_url, json=payload)
-                if response.status_code == 200:
-                    # bot_response = response.json.get("response", "No response from bot.")
-                    bot_response = response.text
-                else:
-                    bot_response = f"Error: {response.status_code} - {response.text}"
-            except Exception as e:
-                bot_response = f"Error connecting to API: {str(e)}"
-            st.session_state.chat_history.append((user_input, bot_response))
-            st.session_state.chat_input = ""    
+            # The request is made while rendering so the reply can stream into the page
+            st.session_state.pending_query = user_input
+            st.session_state.chat_input = ""
+
+    def stream_chat_reply(query, stream):
+        # Booking requests are not safe to replay, so the stream is never retried
+        try:
+            for chunk in client.stream_post(CHAT_API_URL, {"user_query": query}, deadline=CHAT_STREAM_DEADLINE):
+                stream["text"] += chunk
+                yield chunk
+        except ApiError as e:
+            stream["text"] += str(e)
+            yield str(e)
+
+    # Filled below the history; the input is rendered first so it stays usable while a reply streams
+    stream_area = st.container()
 
     # Chat input
     st.text_input("You:", key="chat_input", on_change=handle_chat_input)
+
+    query = st.session_state.pop("pending_query", None)
+    if query:
+        with stream_area:
+            st.markdown(f"**You:** {query}")
+            # Any interaction reruns the script, which stops the stream mid-reply
+            st.button("Cancel", key="cancel_chat")
+            stream = st.session_state.chat_stream = {"user": query, "text": ""}
+            st.markdown("**Bot:**")
+            st.write_stream(stream_chat_reply(query, stream))
+        del st.session_state.chat_stream
+        append_bounded(history, make_chat_record(query, stream["text"]), CHAT_HISTORY_LIMIT)
+        st.rerun()
+
+elif page == "Trends":
+    import pandas as pd
+
+    st.title("Trends")
+    search = st.text_input("Find patient")
+    patients = store.patients(search)
+    if not patients:
+        st.info("No saved results yet; results are saved after each prediction with a patient name.")
+    else:
+        patient = st.selectbox("Patient", patients)
+        fields = store.fields(patient)
+        selected_fields = st.multiselect("Values", fields, default=fields[:3])
+        date_columns = st.columns(2)
+        start = date_columns[0].date_input("From", value=None)
+        end = date_columns[1].date_input("To", value=None)
+        # Only the selected patient's rows for the selected values are read
+        rows = store.trend(patient, selected_fields, start, end)
+        if rows:
+            trend = pd.DataFrame(rows, columns=["date", "field", "value"])
+            trend["date"] = pd.to_datetime(trend["date"])
+            st.line_chart(trend.pivot_table(index="date", columns="field", values="value"))
+        elif selected_fields:
+            st.info("No results in this date range.")
+        st.subheader("Reports")
+        st.dataframe(
+            pd.DataFrame(store.reports(patient), columns=["Date", "Panel", "Prediction", "Message", "Source"]),
+            width="stretch", hide_index=True
+        )
+
+elif page == "Diagnostics":
+    import numpy as np
+    import pandas as pd
+
+    st.title("Diagnostics")
+    st.subheader("Startup and rerun time")
+    startup = get_startup()
+    rerun_samples = tracer.samples("app.rerun")
+    budget_columns = st.columns(3)
+    if startup["cold_start_ms"] is not None:
+        budget_columns[0].metric(
+            f"Cold start ({startup['page']})", f"{startup['cold_start_ms']:.0f} ms",
+            f"{startup['cold_start_ms'] - STARTUP_BUDGET_MS:+.0f} ms vs {STARTUP_BUDGET_MS:.0f} ms budget",
+            delta_color="inverse"
+        )
+    if rerun_samples:
+        rerun_p50, rerun_p95 = (np.percentile(rerun_samples, [50, 95]) * 1000).tolist()
+        budget_columns[1].metric("Rerun p50", f"{rerun_p50:.0f} ms")
+        budget_columns[2].metric(
+            "Rerun p95", f"{rerun_p95:.0f} ms",
+            f"{rerun_p95 - RERUN_BUDGET_MS:+.0f} ms vs {RERUN_BUDGET_MS:.0f} ms budget",
+            delta_color="inverse"
+        )
+    heavy_modules = ["fitz", "pandas", "numpy", "requests", "pyarrow"]
+    st.caption("Loaded in this process: " + ", ".join(m for m in heavy_modules if m in sys.modules))
+
+    st.subheader("Pipeline timings")
+    summary = tracer.summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary).round(3), width="stretch", hide_index=True)
+        span_name = st.selectbox("Histogram for", [row["span"] for row in summary])
+        samples = np.array(tracer.samples(span_name)) * 1000
+        counts, edges = np.histogram(samples, bins=min(30, max(1, len(samples))))
+        st.bar_chart(pd.DataFrame({"count": counts}, index=[f"{edge:.1f}" for edge in edges[:-1]]),
+                     x_label="duration (ms)")
+    else:
+        st.info("No spans recorded yet in this process.")
+    if st.button("Reset timings"):
+        tracer.reset()
+        st.rerun()
+
+    st.subheader("API endpoints")
+    api_metrics = client.metrics()
+    st.dataframe(pd.DataFrame.from_dict(api_metrics, orient="index"), width="stretch")
+    st.subheader("Request queue")
+    queue_columns = st.columns(4)
+    queue_columns[0].metric("Queued", sum(metrics["queued"] for metrics in api_metrics.values()))
+    queue_columns[1].metric("In flight", sum(metrics["in_flight"] for metrics in api_metrics.values()))
+    queue_columns[2].metric("Rejected (waited too long)", sum(metrics["rejected"] for metrics in api_metrics.values()))
+    coalesced = coalescer.stats()
+    queue_columns[3].metric("Coalesced requests", coalesced["coalesced"],
+                            help=f"Identical payloads that waited for a request already in flight "
+                                 f"instead of sending their own; {coalesced['calls']} requests sent")
+    st.caption(
+        f"Limits per endpoint: {f'{API_RATE_LIMIT:g}' if API_RATE_LIMIT else 'unlimited'} requests/s, "
+        f"{API_MAX_CONCURRENT or 'unlimited'} in flight, at most {API_MAX_WAIT:.0f}s queued. "
+        "Queue wait times per endpoint are the wait_p50_ms/wait_p95_ms columns above."
+    )
+    st.subheader("Caches")
+    st.dataframe(pd.DataFrame({name: cache.stats() for name, cache in caches.items()}).T, width="stretch")
+
+# Filled in last so the counters include this run's lookups
+with cache_stats.container():
+    st.caption("Cache")
+    for name, cache in caches.items():
+        stats = cache.stats()
+        st.caption(f"{name}: {stats['hits']} hits / {stats['misses']} misses ({stats['size']} entries)")
+    api_metrics = client.metrics()
+    if api_metrics:
+        st.caption("API latency")
+        for url, metrics in api_metrics.items():
+            st.caption(
+                f"{url.rsplit('/api/', 1)[-1]}: {metrics['count']} calls, "
+                f"p50 {metrics['p50_ms']:.0f} ms, p95 {metrics['p95_ms']:.0f} ms, "
+                f"{metrics['errors']} errors, {metrics['queued']} queued "
+                f"(wait p95 {metrics['wait_p95_ms']:.0f} ms), circuit {metrics['state']}"
+            )
+
+# Whole-script time of this run; runs cut short by st.rerun() or an exception aren't counted
+run_ms = (time.perf_counter() - run_started) * 1000
+startup = get_startup()
+if startup["cold_start_ms"] is None:
+    startup.update(cold_start_ms=run_ms, page=page)
+else:
+    tracer.record("app.rerun", run_ms / 1000)
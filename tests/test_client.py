@@ -0,0 +1,102 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from health_analyzer.client import ApiError, CircuitOpenError, HttpClient, RateLimitError
+
+PREDICT_PATH = "/api/liver-disease/predict"
+CHAT_PATH = "/api/appointment-booking-and-checking"
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_retries_503_until_success():
+    with StubServer(statuses=[503, 503]) as server:
+        client = HttpClient(max_retries=2, backoff=0.01)
+        url = server.url + PREDICT_PATH
+        assert client.post_json(url, {})["prediction"] == "stub"
+        assert server.requests == 3
+        assert client.metrics()[url]["retries"] == 2
+
+def test_gives_up_after_max_retries_on_503():
+    with StubServer(statuses=[503] * 5) as server:
+        client = HttpClient(max_retries=1, backoff=0.01)
+        with pytest.raises(ApiError) as raised:
+            client.post_json(server.url + PREDICT_PATH, {})
+        assert raised.value.status_code == 503
+        assert server.requests == 2
+
+def test_retries_connection_refused():
+    client = HttpClient(max_retries=2, backoff=0.01)
+    url = f"http://127.0.0.1:{unused_port()}/predict"
+    with pytest.raises(ApiError, match="after 3 attempt"):
+        client.post_json(url, {})
+    assert client.metrics()[url]["errors"] == 1
+
+def test_breaker_opens_then_lets_one_half_open_request_through():
+    with StubServer(statuses=[503, 503]) as server:
+        client = HttpClient(max_retries=0, failure_threshold=2, reset_timeout=0.2)
+        url = server.url + PREDICT_PATH
+        for _ in range(2):
+            with pytest.raises(ApiError):
+                client.post_json(url, {})
+        assert client.metrics()[url]["state"] == "open"
+        with pytest.raises(CircuitOpenError):
+            client.post_json(url, {})
+        assert server.requests == 2
+
+        time.sleep(0.25)
+        server.server.latency = 0.3
+        trial = {}
+        thread = threading.Thread(target=lambda: trial.update(result=client.post_json(url, {})))
+        thread.start()
+        time.sleep(0.1)
+        # Only the trial request is let through while it is in flight
+        with pytest.raises(CircuitOpenError):
+            client.post_json(url, {})
+        thread.join()
+        assert trial["result"]["prediction"] == "stub"
+        assert client.metrics()[url]["state"] == "closed"
+        assert server.requests == 3
+
+def test_rate_limit_error_after_max_wait():
+    with StubServer(latency=0.3) as server:
+        url = server.url + PREDICT_PATH
+        client = HttpClient(rate_limits={url: (None, 1, 1)}, max_wait=0.05)
+        thread = threading.Thread(target=client.post_json, args=(url, {}))
+        thread.start()
+        time.sleep(0.1)
+        with pytest.raises(RateLimitError) as raised:
+            client.post_json(url, {})
+        thread.join()
+        assert raised.value.status_code == 429
+        metrics = client.metrics()[url]
+        assert metrics["rejected"] == 1
+        assert metrics["in_flight"] == 0 and metrics["queued"] == 0
+
+def test_stream_post_deadline():
+    with StubServer(chunk_delay=0.05) as server:
+        client = HttpClient()
+        url = server.url + CHAT_PATH
+        chunks = []
+        with pytest.raises(ApiError, match="exceeded"):
+            for chunk in client.stream_post(url, {"user_query": "hi"}, deadline=0.1):
+                chunks.append(chunk)
+        assert chunks
+        assert client.metrics()[url]["errors"] == 1
+
+def test_stream_post_early_close_is_not_a_failure():
+    with StubServer(chunk_delay=0.05) as server:
+        client = HttpClient(failure_threshold=1)
+        url = server.url + CHAT_PATH
+        stream = client.stream_post(url, {"user_query": "hi"})
+        assert next(stream)
+        stream.close()
+        metrics = client.metrics()[url]
+        assert metrics["count"] == 1 and metrics["errors"] == 0
+        assert metrics["state"] == "closed"